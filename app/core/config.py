@@ -12,11 +12,116 @@ class Settings(BaseSettings):
     EMBEDDING_MODEL_NAME: str
     # 모델 실행 디바이스 (cuda:0, mps, cpu 등)
     EMBEDDING_DEVICE: str
+    
+    # 임베딩 마이크로 배치 (동시 요청을 모아 한 번에 forward)
+    EMBEDDING_BATCH_MAX_SIZE: int = 32        # 배치당 최대 문장 수
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = 5.0  # 배치를 채우기 위해 기다리는 최대 시간(ms)
+    
+    # Reranker ONNX 모델 경로
+    RERANKER_MODEL_DIR: str = "app/models/bge-reranker-onnx-int8"
+    # Reranker 요청 간 배치 (동시 요청의 (query, doc) 쌍을 모아 전용 스레드에서 추론)
+    RERANKER_BATCH_MAX_PAIRS: int = 64        # 배치당 최대 (query, doc) 쌍 수
+    RERANKER_BATCH_MAX_WAIT_MS: float = 3.0   # 배치를 채우기 위해 기다리는 최대 시간(ms)
+    RERANKER_BUCKET_SIZE: int = 16            # 길이 버킷 1개당 쌍 수 (한 번의 ONNX 추론 단위)
+    RERANKER_MAX_LENGTH: int = 256            # 토큰 최대 길이
+    # Reranker 점수 캐시 ((질문, 청크 해시) -> 점수)
+    RERANK_CACHE_MAX_SIZE: int = 20000        # 워커 내 LRU 최대 항목 수
+    RERANK_CACHE_REDIS_ENABLED: bool = False  # True 시 Redis에 점수를 공유하여 워커 간 재사용
+    RERANK_CACHE_TTL_SEC: int = 86400         # Redis 점수 TTL(초)
+    # STT 모델 크기 옵션: "tiny", "base", "small", "medium", "large-v3"
+    WHISPER_MODEL_SIZE: str = "medium"
 
     # Database
     DATABASE_URL: str
     REDIS_URL: str
     
+    # 하이브리드 검색 leg별 타임아웃(초). 초과 시 나머지 leg 결과로 병합 진행
+    VECTOR_LEG_TIMEOUT_SEC: float = 2.0
+    KEYWORD_LEG_TIMEOUT_SEC: float = 1.5
+    KEYWORD_LEG_MAX_KEYWORDS: int = 8         # 키워드 leg에 사용하는 최대 키워드 수
+    RRF_K: int = 60                           # Reciprocal Rank Fusion 상수 k
+    RERANK_CANDIDATES: int = 20               # RRF 병합 후 Reranker로 보내는 후보 수
+    RERANK_WINDOW_CHARS: int = 600            # Reranker에 전달하는 청크 앞부분 길이(문자)
+    RETRIEVAL_TOP_K: int = 3                  # 최종 프롬프트에 포함하는 청크 수
+    PUBLIC_PERMISSION_SCOPE: str = "ALL"      # 전사 공개 문서의 권한 범위 값
+    VECTOR_ITERATIVE_SCAN: str = "relaxed_order"  # pgvector hnsw.iterative_scan (off / strict_order / relaxed_order)
+    # 문서 벡터 검색 저장 모드 (full / halfvec / binary)
+    # halfvec, binary : 압축 섀도 컬럼 인덱스로 후보를 뽑고 원본(float32) 벡터로 재정렬
+    VECTOR_STORAGE_MODE: str = "full"
+    VECTOR_RESCORE_CANDIDATES: int = 60       # 압축 인덱스에서 뽑는 재정렬 후보 수
+    # 검색 프로필 (fast / balanced / exhaustive) : HNSW 탐색 깊이(ef_search) 기본값. 요청별로 변경 가능
+    RETRIEVAL_PROFILE: str = "balanced"
+    VECTOR_MIN_CANDIDATES: int = 10           # (iterative_scan off일 때) 벡터 leg 결과가 이보다 적으면 ef_search를 넓혀 재검색
+    # Router 결정 전에 원본 질문으로 벡터 leg를 미리 실행 (vector / both 가 아니면 취소)
+    SPECULATIVE_PREFETCH_ENABLED: bool = True
+    
+    # RDB 스키마 벡터 인덱스 (tbl_deep_nexus_schema를 워커 메모리에 적재)
+    SCHEMA_TOP_K: int = 5                     # Text-to-SQL 프롬프트에 넣을 DDL 수
+    SCHEMA_INDEX_REFRESH_SEC: float = 30.0    # Redis 버전 스탬프 확인 주기(초)
+    # 스키마 컨텍스트 예산 (질문과 관련된 테이블만 프롬프트에 포함, 토큰 수는 tiktoken o200k_base 기준)
+    SCHEMA_CONTEXT_PRUNING: bool = True       # False 시 기존처럼 전체 인벤토리 + 상위 DDL 사용
+    SCHEMA_CONTEXT_MAX_TABLES: int = 8        # 유사도 순으로 포함할 최대 테이블 수 (코드 테이블 제외)
+    SCHEMA_ROUTER_TOKEN_BUDGET: int = 350     # Router 프롬프트의 스키마 인벤토리 토큰 예산
+    SCHEMA_SQL_TOKEN_BUDGET: int = 900        # SQL 프롬프트의 DDL + 인벤토리 토큰 예산
+    
+    # 로컬 의도 분류기 (KURE-v1 임베딩 kNN). 확신도가 높으면 LLM Router 호출 생략
+    LOCAL_ROUTER_ENABLED: bool = True
+    LOCAL_ROUTER_MODEL_PATH: str = "app/models/router_knn.npz"  # app/test/train_local_router.py 로 생성
+    LOCAL_ROUTER_K: int = 7                   # 투표에 참여하는 최근접 질문 수
+    LOCAL_ROUTER_CONFIDENCE: float = 0.8      # 유사도 가중 득표율이 이 값 이상이어야 로컬 결과 사용
+    LOCAL_ROUTER_MIN_SIMILARITY: float = 0.8  # 최근접 질문과의 코사인 유사도 하한
+    LOCAL_ROUTER_REUSE_SIMILARITY: float = 0.97 # 이 유사도 이상인 이웃 질문만 sql_keywords / vector_query 재사용
+    ROUTER_LOG_PATH: str = "app/logs/router_decisions.jsonl"    # LLM Router 결정 로그 (재학습 데이터, 사용자 질문 원문 포함)
+    ROUTER_LOG_MAX_BYTES: int = 20 * 1024 * 1024 # 로그 파일 크기 상한 (초과 시 회전)
+    ROUTER_LOG_BACKUPS: int = 3               # 보관할 회전 로그 개수 (그 이전 기록은 삭제)
+    # Router 결정 캐시 (Redis 벡터 검색, 답변 캐시보다 긴 TTL)
+    ROUTER_CACHE_ENABLED: bool = True
+    ROUTER_CACHE_DISTANCE_THRESHOLD: float = 0.08  # 코사인 거리 기준 (답변 캐시 0.1보다 엄격)
+    ROUTER_CACHE_TTL_SEC: int = 604800             # 7일
+    # Text-to-SQL 플랜 캐시 ((정규화된 질문, 권한 범위) -> 성공한 SQL)
+    SQL_PLAN_CACHE_ENABLED: bool = True
+    SQL_PLAN_CACHE_TTL_SEC: int = 86400
+    # 파라미터화된 SQL 템플릿 (성공한 SQL을 부서/날짜/연도/숫자 슬롯 템플릿으로 학습)
+    SQL_TEMPLATE_ENABLED: bool = True
+    SQL_TEMPLATE_DISTANCE_THRESHOLD: float = 0.05  # 마스킹된 질문 간 코사인 거리 기준
+    SQL_TEMPLATE_MIN_SUPPORT: int = 2              # 같은 템플릿이 이 횟수 이상 생성되어야 사용
+    SQL_TEMPLATE_TTL_SEC: int = 2592000            # 30일
+    DEPARTMENT_DIRECTORY_REFRESH_SEC: float = 600.0 # 부서명 -> 부서코드 사전 갱신 주기(초)
+
+    # SQL 사전 검증
+    SQL_VALIDATION_ENABLED: bool = True    # 실행 전 sqlglot 파싱 + 카탈로그 대조
+    SQL_VALIDATION_EXPLAIN: bool = False   # 실행 전 같은 RLS 세션에서 EXPLAIN(미실행) 수행
+
+    # SQL 비용 가드
+    SQL_GUARD_ENABLED: bool = True         # EXPLAIN 예상 비용 검사 + LIMIT 주입 (EXPLAIN 오류 검증 포함)
+    SQL_GUARD_MAX_COST: float = 1000000.0  # 플래너 Total Cost 상한 (초과 시 실행 전 거부)
+    SQL_GUARD_MAX_ROWS: int = 500          # 최상위 LIMIT 상한 (없거나 더 크면 주입)
+    SQL_STATEMENT_TIMEOUT_MS: int = 10000  # 트랜잭션 단위 statement_timeout (0 = 제한 없음)
+
+    # Text-to-SQL 실행 전용 커넥션 풀 (요청당 1개를 LLM 재시도 동안 보유)
+    SQL_AGENT_POOL_SIZE: int = 10
+    SQL_AGENT_MAX_OVERFLOW: int = 10
+    SQL_AGENT_POOL_TIMEOUT: float = 10.0   # 풀 고갈 시 커넥션 반납 대기 시간(초)
+    SQL_IDLE_IN_TRANSACTION_TIMEOUT_MS: int = 60000 # 재시도 LLM 호출 중 트랜잭션 유휴 상한 (초과 시 서버가 세션 종료)
+
+    # SQL 결과 직렬화 (생성 프롬프트에 들어가는 정형 데이터 크기 상한)
+    SQL_RESULT_MAX_BYTES: int = 16000      # 직렬화된 행 바이트 예산
+    SQL_RESULT_MAX_TOKENS: int = 4000      # 직렬화된 행 토큰 예산 (o200k_base)
+    SQL_RESULT_FETCH_SIZE: int = 200       # 서버 사이드 커서 배치 크기
+
+    # 대량 SQL 결과 요약 모드
+    SQL_SUMMARY_ENABLED: bool = True
+    SQL_SUMMARY_THRESHOLD_ROWS: int = 50   # 전체 건수가 이보다 많으면 집계 요약 + 샘플 행만 전달
+    SQL_SUMMARY_SAMPLE_ROWS: int = 20      # 요약 모드 샘플 행 수
+    SQL_SUMMARY_TOP_N: int = 10            # 범주 컬럼별 상위 값 개수
+    SQL_SUMMARY_MAX_DISTINCT: int = 50     # 고유값이 이보다 많은 컬럼은 그룹 집계 제외
+    
+    # Redis 커넥션 풀 (redis.asyncio)
+    REDIS_MAX_CONNECTIONS: int = 50           # 워커당 최대 커넥션 수
+    REDIS_SOCKET_TIMEOUT: float = 2.0         # 명령 응답 대기 시간(초)
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = 2.0 # 커넥션 수립 대기 시간(초)
+    REDIS_POOL_TIMEOUT: float = 1.0           # 풀 고갈 시 커넥션 반납 대기 시간(초)
+    
     # langsmith
     LANGSMITH_API_KEY : str
     LANGSMITH_TRACING : bool = True
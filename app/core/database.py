@@ -19,7 +19,38 @@ AsyncSessionLocal = sessionmaker(
     autoflush=False,
 )
 
-# 3. FastAPI 의존성 주입용 함수
+# Text-to-SQL 실행 전용 엔진 (RlsSqlSession)
+# - 요청 1건이 LLM 재시도 동안 커넥션 1개를 트랜잭션 상태로 보유하므로, 문서 검색 leg / 하이드레이트가 쓰는 기본 풀과 분리
+# - pool_pre_ping : idle_in_transaction_session_timeout으로 서버가 끊은 커넥션을 재사용하지 않도록 체크아웃 시 확인
+sql_agent_engine = create_async_engine(
+    settings.DATABASE_URL,
+    echo=True,
+    pool_size=settings.SQL_AGENT_POOL_SIZE,
+    max_overflow=settings.SQL_AGENT_MAX_OVERFLOW,
+    pool_timeout=settings.SQL_AGENT_POOL_TIMEOUT,
+    pool_pre_ping=True,
+)
+SqlAgentSessionLocal = sessionmaker(
+    bind=sql_agent_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False,
+)
+
+# 3. Redis 커넥션 풀 및 비동기 클라이언트 생성
+# BlockingConnectionPool : 풀이 고갈되면 에러 대신 REDIS_POOL_TIMEOUT 동안 반납을 기다림
+redis_pool = redis.BlockingConnectionPool.from_url(
+    settings.REDIS_URL,
+    max_connections=settings.REDIS_MAX_CONNECTIONS,
+    timeout=settings.REDIS_POOL_TIMEOUT,
+    socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+    socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+    decode_responses=False,
+)
+redis_client = redis.Redis(connection_pool=redis_pool)
+
+# 4. FastAPI 의존성 주입용 함수
 async def get_db():
     async with AsyncSessionLocal() as session:
         try:
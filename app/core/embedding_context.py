@@ -0,0 +1,40 @@
+import asyncio
+from typing import List, Dict
+from app.core.metrics import metrics
+
+# 요청(/chat 1건) 단위 임베딩 메모
+# - 시맨틱 캐시 조회/저장, 스키마 검색, 하이브리드 검색이 같은 텍스트를 다시 임베딩하지 않도록 결과를 공유
+# - 동일 텍스트가 동시에 요청되면 진행 중인 임베딩 작업(Task)을 함께 기다림
+# - aembed_query 시그니처를 그대로 제공하므로 임베딩 모델 자리에 대신 넘길 수 있음
+class EmbeddingContext:
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def aembed_query(self, text: str) -> List[float]:
+        task = self._tasks.get(text)
+        if task is None:
+            self.misses += 1
+            metrics.incr("embedding_context.misses")
+            task = asyncio.ensure_future(self.embeddings.aembed_query(text))
+            self._tasks[text] = task
+        else:
+            self.hits += 1
+            metrics.incr("embedding_context.hits")
+
+        try:
+            # 한 호출자가 취소되어도 공유 중인 임베딩 작업은 유지
+            return await asyncio.shield(task)
+        except Exception:
+            # 실패한 결과는 메모에 남기지 않음 (다음 호출에서 재시도)
+            if self._tasks.get(text) is task:
+                del self._tasks[text]
+            raise
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def __repr__(self) -> str:
+        return f"EmbeddingContext(hits={self.hits}, misses={self.misses})"
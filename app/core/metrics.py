@@ -0,0 +1,36 @@
+import threading
+from collections import defaultdict
+
+# 프로세스(워커) 단위 인메모리 지표 저장소
+# - counter : 누적 횟수 (캐시 히트/미스 등)
+# - timing  : 구간 소요 시간 (건수, 합계, 최대)
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        self._timings = defaultdict(lambda: {"count": 0, "total": 0.0, "max": 0.0})
+
+    def incr(self, name: str, value: float = 1):
+        with self._lock:
+            self._counters[name] += value
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            timing = self._timings[name]
+            timing["count"] += 1
+            timing["total"] += seconds
+            timing["max"] = max(timing["max"], seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            timings = {
+                name: {
+                    "count": t["count"],
+                    "avg_seconds": t["total"] / t["count"] if t["count"] else 0.0,
+                    "max_seconds": t["max"],
+                }
+                for name, t in self._timings.items()
+            }
+            return {"counters": dict(self._counters), "timings": timings}
+
+metrics = MetricsRegistry()
@@ -0,0 +1,118 @@
+import os
+import time
+import threading
+from typing import Any, Callable, Dict
+from app.core.config import settings
+
+# 현재 프로세스의 상주 메모리(RSS) 바이트 수
+# /proc/self/statm 두 번째 값(resident pages) 사용. Linux 외 환경에서는 0 반환
+def _resident_memory_bytes() -> int:
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return 0
+
+# 임베딩(KURE-v1)
+def _load_embedder():
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    model_kwargs = {'device': settings.EMBEDDING_DEVICE}
+    encode_kwargs = {'normalize_embeddings': True} # 코사인 유사도 검색 시 정규화 권장
+
+    return HuggingFaceEmbeddings(
+        model_name=settings.EMBEDDING_MODEL_NAME,
+        model_kwargs=model_kwargs,
+        encode_kwargs=encode_kwargs
+    )
+
+# Reranker(bge-reranker ONNX INT8) : (tokenizer, model) 튜플
+def _load_reranker():
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+    from transformers import AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(settings.RERANKER_MODEL_DIR)
+    model = ORTModelForSequenceClassification.from_pretrained(
+        settings.RERANKER_MODEL_DIR,
+        provider="CPUExecutionProvider"
+    )
+    return tokenizer, model
+
+# STT(Faster-Whisper)
+# device="cuda" (GPU 사용 시), device="cpu" (CPU 사용 시)
+# compute_type="float16" (GPU), compute_type="int8" (CPU)
+def _load_whisper():
+    from faster_whisper import WhisperModel
+
+    try:
+        # GPU가 있으면 GPU로, 없으면 CPU로 설정
+        import torch
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        compute_type = "float16" if device == "cuda" else "int8"
+    except ImportError:
+        device = "cpu"
+        compute_type = "int8"
+
+    print(f"Loading Faster Whisper model '{settings.WHISPER_MODEL_SIZE}' on {device} with {compute_type}...")
+    return WhisperModel(settings.WHISPER_MODEL_SIZE, device=device, compute_type=compute_type)
+
+
+# 워커 프로세스당 모델 인스턴스를 1개씩만 보유하는 레지스트리
+# - 최초 요청 시 로드(lazy load)하고 이후에는 같은 객체를 공유
+# - 로드 전후 RSS 차이를 모델별 상주 메모리로 기록
+class ModelRegistry:
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], Any]] = {
+            "embedder": _load_embedder,
+            "reranker": _load_reranker,
+            "whisper": _load_whisper,
+        }
+        self._locks = {name: threading.Lock() for name in self._loaders}
+        self._models: Dict[str, Any] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def _get(self, name: str):
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        # 모델별 락 : 동시에 들어온 첫 요청들이 같은 모델을 중복 로드하지 않도록 함
+        with self._locks[name]:
+            model = self._models.get(name)
+            if model is None:
+                rss_before = _resident_memory_bytes()
+                start = time.perf_counter()
+                model = self._loaders[name]()
+                self._stats[name] = {
+                    "resident_bytes": max(_resident_memory_bytes() - rss_before, 0),
+                    "load_seconds": time.perf_counter() - start,
+                }
+                self._models[name] = model
+                print(f"📦 [Model Registry] '{name}' 로드 완료 "
+                      f"({self._stats[name]['resident_bytes'] / 1024 ** 2:.1f} MB, {self._stats[name]['load_seconds']:.2f} sec)")
+        return model
+
+    def get_embeddings(self):
+        return self._get("embedder")
+
+    def get_reranker(self):
+        return self._get("reranker")
+
+    def get_whisper(self):
+        return self._get("whisper")
+
+    # 모델별 로드 여부 및 상주 메모리 보고
+    def memory_report(self) -> Dict[str, Dict[str, Any]]:
+        report = {}
+        for name in self._loaders:
+            stats = self._stats.get(name)
+            report[name] = {
+                "loaded": stats is not None,
+                "resident_mb": round(stats["resident_bytes"] / 1024 ** 2, 1) if stats else 0.0,
+                "load_seconds": round(stats["load_seconds"], 2) if stats else 0.0,
+            }
+        report["process_resident_mb"] = round(_resident_memory_bytes() / 1024 ** 2, 1)
+        return report
+
+model_registry = ModelRegistry()
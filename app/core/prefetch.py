@@ -0,0 +1,61 @@
+import asyncio
+from typing import Any, Awaitable, Dict, Optional, Tuple
+from app.core.metrics import metrics
+
+# 요청(/chat 1건) 단위 추측 실행(speculative prefetch) 작업 보관소
+# - Router LLM이 의도를 결정하는 동안 원본 질문만으로 가능한 검색 작업을 미리 시작
+# - Router 결정 후 resolve(intent)로 쓸모없는 작업은 취소하고, 노드는 take(name)으로 결과를 가져감
+# - 작업마다 입력 키(검색어 등)를 기록하여, 노드가 같은 입력으로 실행한 결과인지(hit) 다른 입력의 보조 결과인지(mismatch) 구분
+# - 메트릭 : prefetch.{name}.hit / mismatch (결과 사용), discarded (취소 / 실패 / 빈 결과로 버려짐)
+class RetrievalPrefetch:
+    def __init__(self):
+        self._tasks: Dict[str, Tuple[asyncio.Task, Tuple[str, ...], Optional[str]]] = {}
+
+    # intents : 이 작업 결과를 사용하는 Router 의도 목록
+    # key : 작업 입력 식별값 (take 시 같은 key일 때만 결과 사용)
+    def start(self, name: str, coro: Awaitable[Any], intents: Tuple[str, ...], key: Optional[str] = None):
+        self._tasks[name] = (asyncio.ensure_future(coro), intents, key)
+        metrics.incr(f"prefetch.{name}.started")
+
+    # Router 의도와 맞지 않는 작업 취소
+    def resolve(self, intent: str):
+        for name, (task, intents, _) in list(self._tasks.items()):
+            if intent not in intents:
+                self._cancel(name)
+
+    # 미리 시작한 작업의 결과와, 호출 측 입력 key와 같은 입력으로 실행했는지 여부
+    # (작업이 없거나 실패했거나 결과가 비었으면 (None, False) → 호출 측에서 직접 실행)
+    async def take(self, name: str, key: Optional[str] = None) -> Tuple[Optional[Any], bool]:
+        entry = self._tasks.pop(name, None)
+        if entry is None:
+            return None, False
+        task, _, started_key = entry
+        try:
+            result = await task
+        except Exception as e:
+            metrics.incr(f"prefetch.{name}.errors")
+            metrics.incr(f"prefetch.{name}.discarded")
+            print(f"[Prefetch Error] {name}: {e}")
+            return None, False
+        if not result:
+            metrics.incr(f"prefetch.{name}.discarded")
+            return None, False
+
+        same_input = key is None or started_key is None or key == started_key
+        metrics.incr(f"prefetch.{name}.hit" if same_input else f"prefetch.{name}.mismatch")
+        return result, same_input
+
+    def _cancel(self, name: str):
+        task, _, _ = self._tasks.pop(name)
+        if not task.done():
+            task.cancel()
+        metrics.incr(f"prefetch.{name}.cancelled")
+        metrics.incr(f"prefetch.{name}.discarded")
+
+    # 요청 종료 시 남은 작업 정리
+    def cancel_all(self):
+        for name in list(self._tasks):
+            self._cancel(name)
+
+    def __repr__(self) -> str:
+        return f"RetrievalPrefetch(pending={list(self._tasks)})"
@@ -0,0 +1,105 @@
+import json
+import time
+import hashlib
+from typing import Optional
+import numpy as np
+import redis.asyncio as redis
+from redis.commands.search.query import Query
+from redis.commands.search.field import TagField, TextField, VectorField
+from redis.commands.search.indexDefinition import IndexDefinition, IndexType
+from app.core.config import settings
+from app.core.database import redis_client
+from app.core.metrics import metrics
+from app.core.schema_cache import SchemaVersionedCache
+from app.core.embedding_context import EmbeddingContext
+from app.services.batching import embedding_batcher
+
+# Router 결정(intent, sql_keywords, vector_query) 캐시
+# - 답변 캐시(SemanticCacheManager)보다 TTL이 길어, 답변이 만료된 반복/유사 질문도 Router LLM 호출을 생략
+# - 질문 벡터 KNN 검색 + 태그 필터 : ctx(파일/대화 기록 유무), schema(카탈로그 버전)
+# - 스키마 인벤토리/DDL이 바뀌면 카탈로그 버전 태그가 달라져 기존 항목은 조회되지 않고, 무효화 훅이 삭제
+class RouterCacheManager(SchemaVersionedCache):
+    def __init__(self, redis_client: redis.Redis):
+        super().__init__(redis_client, "router:", "router_cache")
+        self.index_name = "idx:router_cache"
+        # KURE-v1 임베딩 모델 기준
+        self.vector_dim = 1024
+        self.distance_threshold = settings.ROUTER_CACHE_DISTANCE_THRESHOLD
+        self.ttl = settings.ROUTER_CACHE_TTL_SEC
+        self.embeddings = embedding_batcher
+
+    # 서버 시작 시(lifespan) 1회 호출 : 인덱스 확인 및 생성
+    async def initialize(self):
+        try:
+            await self.r.ft(self.index_name).info()
+            print(f"✅ [Router Cache] 인덱스 '{self.index_name}'가 이미 존재합니다.")
+        except Exception:
+            try:
+                schema = (
+                    TagField("ctx"),
+                    TagField("schema"),
+                    TextField("intent"),
+                    VectorField("query_vector",
+                        "HNSW", {
+                            "TYPE": "FLOAT32",
+                            "DIM": self.vector_dim,
+                            "DISTANCE_METRIC": "COSINE"
+                        }
+                    )
+                )
+                definition = IndexDefinition(prefix=[self.prefix], index_type=IndexType.HASH)
+                await self.r.ft(self.index_name).create_index(schema, definition=definition)
+                print("🚀 [Router Cache] Redis Vector Index 생성 완료.")
+            except Exception as create_error:
+                print(f"❌ [Router Cache] 인덱스 생성 실패: {create_error}")
+
+    # 파일 / 대화 기록 유무 태그
+    @staticmethod
+    def context_tag(is_file_uploaded: bool, has_history: bool) -> str:
+        return f"{'file' if is_file_uploaded else 'nofile'}_{'history' if has_history else 'nohistory'}"
+
+    async def search(self, question: str, ctx: str, embedding_ctx: Optional[EmbeddingContext] = None) -> Optional[dict]:
+        try:
+            query_vector = await (embedding_ctx or self.embeddings).aembed_query(question)
+            q = Query(f"(@ctx:{{{ctx}}} @schema:{{{self.schema_tag()}}})=>[KNN 1 @query_vector $vec AS score]")\
+                .return_fields("intent", "sql_keywords", "vector_query", "score")\
+                .dialect(2)
+            res = await self.r.ft(self.index_name).search(q, query_params={"vec": np.array(query_vector, dtype=np.float32).tobytes()})
+
+            if res.total > 0 and float(res.docs[0].score) < self.distance_threshold:
+                top_hit = res.docs[0]
+                metrics.incr("router_cache.hits")
+                print(f"[Router Cache Hit] Score: {float(top_hit.score):.4f}")
+                return {
+                    "intent": top_hit.intent,
+                    "sql_keywords": json.loads(top_hit.sql_keywords),
+                    "vector_query": top_hit.vector_query,
+                }
+            metrics.incr("router_cache.misses")
+            return None
+        except Exception as e:
+            print(f"[Router Cache Search Error] {e}")
+            return None
+
+    async def store(self, question: str, ctx: str, result: dict, embedding_ctx: Optional[EmbeddingContext] = None):
+        try:
+            query_vector = await (embedding_ctx or self.embeddings).aembed_query(question)
+            schema = self.schema_tag()
+            key = f"{self.prefix}{schema}:{ctx}:{hashlib.sha1(question.encode('utf-8')).hexdigest()[:16]}"
+            mapping = {
+                "ctx": ctx,
+                "schema": schema,
+                "intent": result["intent"],
+                "sql_keywords": json.dumps(result["sql_keywords"], ensure_ascii=False),
+                "vector_query": result["vector_query"],
+                "query_vector": np.array(query_vector, dtype=np.float32).tobytes(),
+                "created_at": time.time()
+            }
+            async with self.r.pipeline() as pipe:
+                pipe.hset(key, mapping=mapping)
+                pipe.expire(key, self.ttl)
+                await pipe.execute()
+        except Exception as e:
+            print(f"[Router Cache Store Error] {e}")
+
+router_cache = RouterCacheManager(redis_client)
@@ -0,0 +1,47 @@
+import asyncio
+import hashlib
+from typing import List, Optional
+import redis.asyncio as redis
+from app.core.metrics import metrics
+from app.core.schema_catalog import schema_catalog
+
+# 스키마 카탈로그 버전에 묶인 Redis 캐시의 공통 기반
+# - 키는 "{prefix}{schema_tag}:..." 형식으로 저장 (버전이 바뀌면 기존 키는 조회되지 않음)
+# - 카탈로그 버전 변경 훅에서 이전 버전 키를 일괄 삭제
+class SchemaVersionedCache:
+    def __init__(self, redis_client: redis.Redis, prefix: str, name: str):
+        self.r = redis_client
+        self.prefix = prefix
+        self.name = name
+        self._invalidate_task: Optional[asyncio.Task] = None
+        schema_catalog.add_listener(self._on_schema_change)
+
+    # 카탈로그 버전 태그 (Redis 태그 쿼리 이스케이프가 필요 없도록 해시로 변환)
+    @staticmethod
+    def schema_tag(version: Optional[str] = None) -> str:
+        return hashlib.sha1((version or schema_catalog.version).encode()).hexdigest()[:12]
+
+    # 현재 카탈로그 버전이 아닌 항목 삭제
+    async def invalidate(self, version: Optional[str] = None) -> int:
+        current = f"{self.prefix}{self.schema_tag(version)}:"
+        deleted = 0
+        try:
+            stale: List[bytes] = []
+            async for key in self.r.scan_iter(match=f"{self.prefix}*", count=500):
+                if not key.decode().startswith(current):
+                    stale.append(key)
+            for i in range(0, len(stale), 500):
+                deleted += await self.r.unlink(*stale[i:i + 500])
+            metrics.incr(f"{self.name}.invalidated", deleted)
+            print(f"🧹 [{self.name}] 스키마 변경으로 {deleted}건 무효화")
+        except Exception as e:
+            print(f"[{self.name} Invalidate Error] {e}")
+        return deleted
+
+    # schema_catalog 무효화 훅 (동기 콜백이므로 실행 중인 이벤트 루프에 삭제 작업 예약)
+    def _on_schema_change(self, version: str):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._invalidate_task = loop.create_task(self.invalidate(version))
@@ -0,0 +1,131 @@
+import os
+import json
+import hashlib
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from app.core.schema_index import SchemaVectorIndex, schema_index
+
+SCHEMA_INVENTORY_PATH = Path(__file__).resolve().parent / "schema_inventory.json"
+
+# 스키마명(public.) 접두사를 떼어낸 테이블명
+def bare_table_name(table_name: str) -> str:
+    return table_name.split(".", 1)[-1].strip().lower()
+
+# 코드(마스터) 테이블 판별 : 첫 컬럼이 *_code / *_id 이고 같은 접두사의 *_name 컬럼을 가진 4컬럼 이하 테이블
+# (예: departments, job_ranks, leave_types)
+def _is_code_table(columns: List[str]) -> bool:
+    if not columns or len(columns) > 4:
+        return False
+    key = columns[0]
+    for suffix in ("_code", "_id"):
+        if key.endswith(suffix):
+            return f"{key[:-len(suffix)]}_name" in columns
+    return False
+
+# DB 스키마 카탈로그 (schema_inventory.json + 스키마 벡터 인덱스의 DDL)
+# - JSON은 파일 mtime이 바뀔 때만 다시 읽고(버전은 파일 내용 해시 기준), 프롬프트용 텍스트는 적재 시 한 번만 만들어 둠
+# - DDL 조회는 schema_index 를 사용하며, 인덱스 버전이 바뀌면 테이블명 매핑을 다시 구성
+class SchemaCatalog:
+    def __init__(self, path: Path, schema_index: SchemaVectorIndex):
+        self.path = path
+        self.schema_index = schema_index
+        self._loaded: Tuple[Optional[int], Optional[str]] = (None, None)
+        # 인벤토리 파일 내용 해시 (mtime은 재적재 트리거로만 쓰고, 버전은 내용 기준 → 재배포 / touch / 호스트 간 차이에 무관)
+        self._content_hash: Optional[str] = None
+        self._columns: Dict[str, List[str]] = {}
+        self._ddl_names: Dict[str, str] = {}
+        self._inventory_lines: Dict[str, str] = {}
+        self._inventory_text = "정보 없음"
+        self._listeners: List[Callable[[str], None]] = []
+
+    def _load(self):
+        with open(self.path, "rb") as f:
+            raw = f.read()
+        schema_data = json.loads(raw.decode("utf-8"))
+        self._content_hash = hashlib.sha1(raw).hexdigest()[:16]
+
+        self._columns = {bare_table_name(item["table_name"]): list(item["column_list"]) for item in schema_data}
+        # LLM이 읽기 편한 리스트 형태로 변환 (테이블별 한 줄 + 전체 텍스트)
+        self._inventory_lines = {
+            bare_table_name(item["table_name"]): f"- {item['table_name']}: {', '.join(item['column_list'])}"
+            for item in schema_data
+        }
+        self._inventory_text = "\n".join(self._inventory_lines.values())
+        print(f"📚 [Schema Catalog] {len(self._columns)}개 테이블 인벤토리 적재 완료")
+
+    # 파일 mtime 또는 스키마 인덱스 버전이 바뀐 경우에만 다시 구성
+    # (리스너는 mtime이 아니라 내용 기반 버전이 실제로 바뀐 경우에만 호출)
+    def _ensure_fresh(self):
+        try:
+            mtime_ns = os.stat(self.path).st_mtime_ns
+        except OSError as e:
+            if self._loaded[0] is None:
+                print(f"스키마 인벤토리 로드 실패: {e}")
+            mtime_ns = self._loaded[0]
+
+        previous_version = self._version()
+        if mtime_ns is not None and mtime_ns != self._loaded[0]:
+            try:
+                self._load()
+            except Exception as e:
+                # 파싱 실패 시 직전 인벤토리를 계속 사용
+                print(f"스키마 인벤토리 로드 실패: {e}")
+                mtime_ns = self._loaded[0]
+
+        if self.schema_index.version != self._loaded[1]:
+            self._ddl_names = {bare_table_name(name): name for name in self.schema_index.table_names}
+
+        initial = self._loaded[0] is None
+        self._loaded = (mtime_ns, self.schema_index.version)
+        if not initial and self._version() != previous_version:
+            # 스키마 의존 캐시 무효화 훅 (최초 적재 시에는 호출하지 않음)
+            for listener in self._listeners:
+                try:
+                    listener(self._version())
+                except Exception as e:
+                    print(f"[Schema Catalog Listener Error] {e}")
+
+    # 카탈로그 버전이 바뀔 때 호출할 콜백 등록 (인자 : 새 버전)
+    def add_listener(self, listener: Callable[[str], None]):
+        self._listeners.append(listener)
+
+    # 카탈로그 버전 (인벤토리 파일 내용 해시 + 스키마 인덱스 버전). 스키마 의존 캐시의 키로 사용
+    @property
+    def version(self) -> str:
+        self._ensure_fresh()
+        return self._version()
+
+    def _version(self) -> str:
+        return f"{self._content_hash or 0}:{self._loaded[1] or 0}"
+
+    # 프롬프트용 전체 테이블 인벤토리 ("- 테이블: 컬럼, 컬럼, ...")
+    def inventory_text(self) -> str:
+        self._ensure_fresh()
+        return self._inventory_text
+
+    # 테이블 1개의 인벤토리 줄 (없는 테이블이면 None)
+    def inventory_line(self, table_name: str) -> Optional[str]:
+        self._ensure_fresh()
+        return self._inventory_lines.get(bare_table_name(table_name))
+
+    def tables(self) -> List[str]:
+        self._ensure_fresh()
+        return list(self._columns)
+
+    def get_columns(self, table_name: str) -> Optional[List[str]]:
+        self._ensure_fresh()
+        return self._columns.get(bare_table_name(table_name))
+
+    def get_ddl(self, table_name: str) -> Optional[str]:
+        self._ensure_fresh()
+        name = self._ddl_names.get(bare_table_name(table_name))
+        return self.schema_index.get_ddl(name) if name else None
+
+    def is_code_table(self, table_name: str) -> bool:
+        return _is_code_table(self.get_columns(table_name) or [])
+
+    def code_tables(self) -> List[str]:
+        self._ensure_fresh()
+        return [table for table, columns in self._columns.items() if _is_code_table(columns)]
+
+schema_catalog = SchemaCatalog(SCHEMA_INVENTORY_PATH, schema_index)
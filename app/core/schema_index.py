@@ -0,0 +1,107 @@
+import time
+import asyncio
+from typing import List, Optional, Tuple
+import numpy as np
+import redis.asyncio as redis
+from sqlalchemy import text
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, redis_client
+from app.core.metrics import metrics
+
+# generate_structured_vector.py 가 tbl_deep_nexus_schema 재적재 후 올리는 버전 스탬프
+SCHEMA_VERSION_KEY = "schema:version"
+
+# tbl_deep_nexus_schema(약 20개 테이블)를 워커 메모리의 NumPy 행렬로 보관하는 스키마 벡터 인덱스
+# - 기동 시 1회 적재 후, 검색은 프로세스 내 행렬 곱으로 처리 (DB 커넥션/네트워크 왕복 없음)
+# - SCHEMA_INDEX_REFRESH_SEC 주기로 Redis 버전 스탬프를 확인해 바뀌었으면 다시 적재
+class SchemaVectorIndex:
+    def __init__(self, redis_client: redis.Redis, refresh_interval: float):
+        self.r = redis_client
+        self.refresh_interval = refresh_interval
+        self.version: Optional[str] = None
+        self.table_names: List[str] = []
+        self.ddls: List[str] = []
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _current_version(self) -> str:
+        try:
+            value = await self.r.get(SCHEMA_VERSION_KEY)
+            return value.decode() if value else "0"
+        except Exception as e:
+            # Redis 장애 시 기존 행렬을 계속 사용
+            print(f"[Schema Index Version Error] {e}")
+            return self.version or "0"
+
+    async def load(self):
+        version = await self._current_version()
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(text("""
+                SELECT table_name, ddl_content, CAST(schema_vector AS real[]) AS vector
+                FROM tbl_deep_nexus_schema
+                ORDER BY table_name
+            """))
+            rows = result.fetchall()
+
+        matrix = np.array([row.vector for row in rows], dtype=np.float32)
+        if len(rows):
+            # 코사인 거리(<=>)와 같은 순위를 내도록 행 단위 정규화
+            matrix /= np.clip(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12, None)
+
+        self.table_names = [row.table_name for row in rows]
+        self.ddls = [row.ddl_content for row in rows]
+        self._matrix = matrix
+        self.version = version
+        self._checked_at = time.monotonic()
+        metrics.incr("schema_index.loads")
+        print(f"📚 [Schema Index] {len(rows)}개 테이블 적재 완료 (version={version})")
+
+    # 적재 실패(DB 미기동 등) 시 예외 대신 False 반환 -> 이후 검색 시점에 재시도
+    async def try_load(self) -> bool:
+        try:
+            await self.load()
+            return True
+        except Exception as e:
+            self._checked_at = time.monotonic()
+            metrics.incr("schema_index.load_errors")
+            print(f"⚠️ [Schema Index] 적재 실패, {self.refresh_interval:.0f}초 후 재시도: {e}")
+            return False
+
+    # 버전 스탬프 확인 주기가 지났고 버전이 바뀌었으면(또는 아직 적재 전이면) 재적재
+    async def refresh_if_stale(self):
+        if time.monotonic() - self._checked_at < self.refresh_interval:
+            return
+        async with self._lock:
+            if time.monotonic() - self._checked_at < self.refresh_interval:
+                return
+            version = await self._current_version()
+            if self.version is None or version != self.version:
+                await self.try_load()
+            else:
+                self._checked_at = time.monotonic()
+
+    # 질의 벡터와 가장 가까운 상위 k개 (table_name, ddl_content, 유사도)
+    async def search(self, query_vector: List[float], k: int) -> List[Tuple[str, str, float]]:
+        await self.refresh_if_stale()
+        if not self.ddls:
+            return []
+
+        query = np.asarray(query_vector, dtype=np.float32)
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+        scores = self._matrix @ query
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.table_names[i], self.ddls[i], float(scores[i])) for i in top]
+
+    # 테이블명으로 DDL 조회 (정확히 일치하는 항목이 없으면 None)
+    def get_ddl(self, table_name: str) -> Optional[str]:
+        try:
+            return self.ddls[self.table_names.index(table_name)]
+        except ValueError:
+            return None
+
+schema_index = SchemaVectorIndex(redis_client, settings.SCHEMA_INDEX_REFRESH_SEC)
@@ -1,37 +1,44 @@
-import redis
+import redis.asyncio as redis
 import numpy as np
 from redis.commands.search.query import Query
 import time
+import hashlib
 from typing import Optional, List
-from redis.commands.search.field import TextField, VectorField
+from redis.commands.search.field import TagField, TextField, VectorField
 from redis.commands.search.indexDefinition import IndexDefinition, IndexType
-from app.services.llm import get_embeddings
+from app.services.batching import embedding_batcher
+from app.core.embedding_context import EmbeddingContext
 
 class SemanticCacheManager:
     def __init__(self, redis_client: redis.Redis):
         # Redis Client
         self.r = redis_client
-        self.index_name = "idx:semantic_cache"
+        # 권한 범위 태그가 추가된 인덱스 (이전 idx:semantic_cache 항목은 범위 정보가 없어 사용하지 않음)
+        self.index_name = "idx:semantic_cache_scoped"
+        self.prefix = "cache:scoped:"
         # KURE-v1 임베딩 모델 기준
         self.vector_dim = 1024 
         # 유사도 기준 (0.1 거리 = 약 90% 유사도)
         self.distance_threshold = 0.1
         
-        # 임베딩 모델 초기화
-        self.embeddings = get_embeddings()
+        # 임베딩 모델 초기화 (동시 요청을 배치로 묶는 공유 임베딩 서비스)
+        self.embeddings = embedding_batcher
         print('semantic init!!')
-        # 인덱스 확인 및 생성
-        self._create_index()
 
-    def _create_index(self):
+    # 서버 시작 시(lifespan) 1회 호출 : 인덱스 확인 및 생성
+    async def initialize(self):
+        await self._create_index()
+
+    async def _create_index(self):
         try:
-            self.r.ft(self.index_name).info()
+            await self.r.ft(self.index_name).info()
             print(f"✅ [Semantic Cache] 인덱스 '{self.index_name}'가 이미 존재합니다.")
         except Exception as e:
             # 인덱스가 없는 것인지, 아니면 Redis가 Search를 지원 안 하는지 확인
             print(f"🔍 [Semantic Cache] 인덱스 확인 중 참고사항: {e}")
             try:
                 schema = (
+                    TagField("scope"),
                     TextField("response_text"),
                     VectorField("query_vector",
                         "HNSW", {
@@ -41,30 +48,41 @@ class SemanticCacheManager:
                         }
                     )
                 )
-                definition = IndexDefinition(prefix=["cache:"], index_type=IndexType.HASH)
-                self.r.ft(self.index_name).create_index(schema, definition=definition)
+                definition = IndexDefinition(prefix=[self.prefix], index_type=IndexType.HASH)
+                await self.r.ft(self.index_name).create_index(schema, definition=definition)
                 print("🚀 [Semantic Cache] Redis Vector Index 생성 완료.")
             except Exception as create_error:
                 # 여기서 에러가 찍힌다면 99% 모듈 미설치 또는 파라미터 불일치입니다.
                 print(f"❌ [Semantic Cache] 인덱스 생성 치명적 실패: {create_error}")
 
-    async def get_embedding(self, text: str) -> List[float]:
-        # 비동기 임베딩 생성
-        return await self.embeddings.aembed_query(text)
+    # 답변이 만들어진 권한 범위 태그 (부서 권한 문서 + 직급/부서 RLS가 적용된 정형 데이터 기준)
+    # 같은 질문이라도 범위가 다른 사용자에게는 캐시된 답변을 제공하지 않음
+    # employee_id : 사원 단위 답변(RLS의 app.current_employee_id가 결과에 영향을 줄 수 있는 정형 데이터 답변)일 때 지정
+    @staticmethod
+    def scope_tag(department_code: str, parent_department: str, job_rank_id: str, employee_id: Optional[str] = None) -> str:
+        scope = f"{department_code}|{parent_department}|{job_rank_id}"
+        if employee_id:
+            scope = f"{scope}|{employee_id}"
+        return hashlib.sha1(scope.encode("utf-8")).hexdigest()[:12]
+
+    async def get_embedding(self, text: str, embedding_ctx: Optional[EmbeddingContext] = None) -> List[float]:
+        # 비동기 임베딩 생성 (요청 단위 임베딩 메모가 있으면 재사용)
+        return await (embedding_ctx or self.embeddings).aembed_query(text)
 
-    async def search_cache(self, query_text: str) -> Optional[str]:
+    # scopes : 조회 가능한 범위 태그 목록 (권한 범위 공용 태그 + 본인 사원 단위 태그)
+    async def search_cache(self, query_text: str, scopes: List[str], embedding_ctx: Optional[EmbeddingContext] = None) -> Optional[str]:
         print("search_cache!!!!")
         try:
-            query_vector = await self.get_embedding(query_text)
+            query_vector = await self.get_embedding(query_text, embedding_ctx)
             query_vector_bytes = np.array(query_vector, dtype=np.float32).tobytes()
 
-            q = Query("*=>[KNN 1 @query_vector $vec AS score]")\
+            q = Query(f"(@scope:{{{' | '.join(scopes)}}})=>[KNN 1 @query_vector $vec AS score]")\
                 .return_fields("response_text", "score")\
                 .dialect(2)
             params = {"vec": query_vector_bytes}
             
             # Redis 검색
-            res = self.r.ft(self.index_name).search(q, query_params=params)
+            res = await self.r.ft(self.index_name).search(q, query_params=params)
             
             if res.total > 0:
                 top_hit = res.docs[0]
@@ -79,22 +97,23 @@ class SemanticCacheManager:
             print(f"[Cache Search Error] {e}")
             return None
 
-    async def store_cache(self, query_text: str, response_text: str):
+    async def store_cache(self, query_text: str, response_text: str, scope: str, embedding_ctx: Optional[EmbeddingContext] = None):
         try:
-            query_vector = await self.get_embedding(query_text)
+            query_vector = await self.get_embedding(query_text, embedding_ctx)
             query_vector_bytes = np.array(query_vector, dtype=np.float32).tobytes()
             
-            key = f"cache:{hash(query_text)}"
+            key = f"{self.prefix}{scope}:{hash(query_text)}"
             mapping = {
+                "scope": scope,
                 "response_text": response_text,
                 "query_vector": query_vector_bytes,
                 "created_at": time.time()
             }
             
-            pipe = self.r.pipeline()
-            pipe.hset(key, mapping=mapping)
-            pipe.expire(key, 86400) # 24시간 TTL
-            pipe.execute()
+            async with self.r.pipeline() as pipe:
+                pipe.hset(key, mapping=mapping)
+                pipe.expire(key, 86400) # 24시간 TTL
+                await pipe.execute()
             print(f"[Cache Saved] Query: {query_text[:20]}...")
         except Exception as e:
             print(f"[Cache Store Error] {e}")
\ No newline at end of file
@@ -0,0 +1,55 @@
+import hashlib
+from typing import Optional
+import redis.asyncio as redis
+from app.core.config import settings
+from app.core.database import redis_client
+from app.core.metrics import metrics
+from app.core.schema_cache import SchemaVersionedCache
+from app.utils.question import normalize_question
+
+# Text-to-SQL 플랜 캐시 : (정규화된 질문, 사용자 권한 범위) -> 마지막으로 성공한 SQL
+# - 권한 범위 : (job_rank_id, department_code, parent_department). 같은 질문이라도 범위가 다르면 다른 SQL
+# - SQL에 사용자 본인의 사원 ID / 이메일이 들어간 경우 사원 단위 키로 저장
+# - 캐시된 SQL도 RlsSqlSession으로 실행하므로 RLS는 그대로 적용
+# - 키에 스키마 카탈로그 버전이 포함되어 스키마 변경 시 조회되지 않고, 무효화 훅이 삭제
+class SqlPlanCache(SchemaVersionedCache):
+    def __init__(self, redis_client: redis.Redis, ttl: int):
+        super().__init__(redis_client, "sqlplan:", "sql_plan_cache")
+        self.ttl = ttl
+
+    def _scope_key(self, question: str, job_rank_id: str, department_code: str, parent_department: str) -> str:
+        question_hash = hashlib.sha1(normalize_question(question).encode("utf-8")).hexdigest()[:16]
+        return f"{self.prefix}{self.schema_tag()}:{question_hash}:{job_rank_id}:{department_code}:{parent_department}"
+
+    # 사원 단위 키 -> 권한 범위 키 순서로 조회
+    async def get(self, question: str, employee_id: str, job_rank_id: str, department_code: str, parent_department: str) -> Optional[str]:
+        scope_key = self._scope_key(question, job_rank_id, department_code, parent_department)
+        try:
+            user_sql, scope_sql = await self.r.mget([f"{scope_key}:{employee_id}", scope_key])
+        except Exception as e:
+            print(f"[SQL Plan Cache Error] {e}")
+            return None
+
+        sql = user_sql or scope_sql
+        metrics.incr("sql_plan_cache.hits" if sql else "sql_plan_cache.misses")
+        return sql.decode("utf-8") if sql else None
+
+    async def set(self, question: str, sql: str, employee_id: str, company_email: str, job_rank_id: str, department_code: str, parent_department: str):
+        key = self._scope_key(question, job_rank_id, department_code, parent_department)
+        # 본인 식별값이 SQL에 들어가 있으면 다른 사용자와 공유하지 않음
+        if employee_id in sql or (company_email and company_email in sql):
+            key = f"{key}:{employee_id}"
+        try:
+            await self.r.setex(key, self.ttl, sql)
+        except Exception as e:
+            print(f"[SQL Plan Cache Error] {e}")
+
+    # 실행에 실패한 캐시 SQL 제거
+    async def delete(self, question: str, employee_id: str, job_rank_id: str, department_code: str, parent_department: str):
+        scope_key = self._scope_key(question, job_rank_id, department_code, parent_department)
+        try:
+            await self.r.unlink(f"{scope_key}:{employee_id}", scope_key)
+        except Exception as e:
+            print(f"[SQL Plan Cache Error] {e}")
+
+sql_plan_cache = SqlPlanCache(redis_client, settings.SQL_PLAN_CACHE_TTL_SEC)
@@ -1,47 +1,63 @@
 from app.schemas.model import AgentState, RouterOutput
 from app.services.llm import get_llm
-from app.services.tools import search_schema_and_get_ddl, execute_sql_query, hybrid_vector_search
+from app.services.tools import RlsSqlSession, hybrid_vector_search, prefetch_vector_leg
+from app.core.config import settings
 from langchain_core.prompts import ChatPromptTemplate
-import json
-from pathlib import Path
-import os
-
-# 프로젝트 루트 경로 설정
-current_dir = os.path.dirname(os.path.abspath(__file__))
-project_root = os.path.dirname(os.path.dirname(current_dir))
+from app.services.schema_context import build_router_schema_context, build_sql_schema_context
+from app.services.local_router import local_router
+from app.core.router_cache import router_cache
+from app.core.sql_plan_cache import sql_plan_cache
+from app.services.sql_templates import sql_template_library, CONTEXT_SLOTS
+from app.services.sql_validator import validate_sql
+from app.services.sql_result import RESULT_PREFIX
+from app.core.metrics import metrics
+from app.utils.question import references_history
+from app.utils.background import run_in_background
+import time
 
 llm_gpt4o = get_llm("gpt-4o")
 llm_gpt4o_mini = get_llm("gpt-4o-mini")
 
-# JSON 파일에서 DB 스키마 인벤토리 로드
-def get_schema_inventory_text() -> str:
-    # 현재 파일 위치 기준으로 JSON 파일 경로 계산
-    json_path = Path(project_root) / "app" / "core" / "schema_inventory.json"
-    
-    try:
-        with open(json_path, "r", encoding="utf-8") as f:
-            schema_data = json.load(f)
-        
-        # LLM이 읽기 편한 리스트 형태로 변환
-        inventory_lines = []
-        for item in schema_data:
-            line = f"- {item['table_name']}: {', '.join(item['column_list'])}"
-            inventory_lines.append(line)
-        
-        return "\n".join(inventory_lines)
-    except Exception as e:
-        print(f"스키마 인벤토리 로드 실패: {e}")
-        return "정보 없음"
-    
-    
 # 1. 정형/비정형 경로 설정
 async def router_node(state: AgentState):
-    # DB 스키마 JSON
-    actual_schema_context = get_schema_inventory_text()
-    
     # 사용자 업로드 파일 유무
     file_content = state.get("file_context", "")
     is_file_uploaded = bool(file_content and file_content.strip())
+    history_referenced = references_history(state["question"])
+    
+    # 추측 실행 : Router가 의도를 결정하는 동안 원본 질문으로 벡터 leg를 미리 시작
+    # (파일 분석 요청은 검색을 하지 않으므로 제외)
+    # Router의 검색어(vector_query)가 원본 질문과 같으면 벡터 leg로 그대로 사용하고,
+    # 확장된 검색어면 확장 검색어 벡터 leg와 함께 RRF에 추가 순위 목록으로 병합 (원본 질문 기준 재현율 보강)
+    prefetch = state.get("prefetch")
+    if prefetch is not None and settings.SPECULATIVE_PREFETCH_ENABLED and not is_file_uploaded:
+        prefetch.start(
+            "vector",
+            prefetch_vector_leg(
+                state["question"], state["department_code"], state["parent_department"],
+                state.get("embedding_context"), state.get("retrieval_profile")
+            ),
+            intents=("vector", "both"),
+            key=state["question"]
+        )
+    
+    # Router 결정 캐시 : 이전 대화를 참조하는 질문은 같은 문장이라도 결정이 달라지므로 제외
+    use_router_cache = settings.ROUTER_CACHE_ENABLED and not history_referenced
+    router_ctx = router_cache.context_tag(is_file_uploaded, bool(state.get("history")))
+    if use_router_cache:
+        cached_result = await router_cache.search(state["question"], router_ctx, state.get("embedding_context"))
+        if cached_result:
+            return _router_output(cached_result, prefetch)
+    
+    # 로컬 의도 분류기 : 파일 첨부/이전 대화 참조 질문은 문장만으로 판단할 수 없으므로 LLM으로 처리
+    if not is_file_uploaded and not history_referenced:
+        local_result = await local_router.route(state["question"], state.get("embedding_context"))
+        if local_result:
+            print(f"🧭 [Local Router] {local_result['intent']} (confidence={local_result['confidence']:.2f})")
+            return _router_output(local_result, prefetch)
+    
+    # 질문과 관련된 테이블만 토큰 예산 안에서 추린 DB 스키마 인벤토리
+    actual_schema_context = await build_router_schema_context(state["question"], state.get("embedding_context"))
     
     # 사용자 <> LLM 답변 이전 대화 기록 정보
     history = state.get("history", "")
@@ -155,6 +171,7 @@ async def router_node(state: AgentState):
     chain = prompt | llm_gpt4o_mini.with_structured_output(RouterOutput)
     
     # 질문 분석 후, RouterOutput 스키마에 맞게 구조화된 출력 생성
+    start = time.perf_counter()
     raw_result = await chain.ainvoke({
         "question": state["question"], 
         "actual_schema_context" : actual_schema_context,
@@ -166,8 +183,19 @@ async def router_node(state: AgentState):
     # 딕셔너리로 변환
     result = raw_result.model_dump()
     
+    # LLM 결정 기록 (로컬 의도 분류기 재학습 데이터) 및 Router 결정 캐시 저장 : 응답을 기다리게 하지 않도록 백그라운드 실행
+    run_in_background(local_router.log_decision(state["question"], result, is_file_uploaded, history_referenced, time.perf_counter() - start))
+    if use_router_cache:
+        run_in_background(router_cache.store(state["question"], router_ctx, result, state.get("embedding_context")))
+    
     #print(f"Router Node Output : {result}")
     
+    return _router_output(result, prefetch)
+
+# Router 결정(LLM / 캐시 / 로컬 분류기)을 상태 업데이트로 변환하고, 의도와 맞지 않는 추측 실행 작업 취소
+def _router_output(result: dict, prefetch) -> dict:
+    if prefetch is not None:
+        prefetch.resolve(result["intent"])
     return {
         "intent": result["intent"], 
         "optimized_sql_keywords": result["sql_keywords"],
@@ -184,10 +212,47 @@ class SQLGenerationResponse(BaseModel):
     sql: str = Field(description="최종 PostgreSQL 쿼리")
 
 async def sql_agent_node(state: AgentState):
+    # 요청 단위로 RLS 커넥션 1개만 사용 (플랜 캐시 / 템플릿 / LLM 재시도는 세이브포인트로 구분)
+    async with RlsSqlSession(state["employee_id"], state["department_code"], state["parent_department"], state["job_rank_id"]) as rls_session:
+        return await _generate_and_execute_sql(state, rls_session)
+
+async def _generate_and_execute_sql(state: AgentState, rls_session: RlsSqlSession):
+    # 이전 대화를 참조하는 질문은 SQL이 대화 기록에 따라 달라지므로 플랜 캐시 / 템플릿을 사용하지 않음
+    history_referenced = references_history(state["question"])
+    
+    # SQL 플랜 캐시 : 같은 권한 범위에서 같은 질문에 성공했던 SQL 재사용
+    use_plan_cache = settings.SQL_PLAN_CACHE_ENABLED and not history_referenced
+    plan_args = (state["employee_id"], state["job_rank_id"], state["department_code"], state["parent_department"])
+    if use_plan_cache:
+        cached_sql = await sql_plan_cache.get(state["question"], *plan_args)
+        if cached_sql:
+            result = await rls_session.execute(cached_sql)
+            if "Error:" not in result:
+                print("🗂️ [SQL Plan Cache Hit]")
+                return {"rdb_result": result, "generated_sql": cached_sql}
+            # 실행 실패 시 캐시 항목을 지우고 LLM으로 다시 생성
+            await sql_plan_cache.delete(state["question"], *plan_args)
+    
+    # SQL 템플릿 : 이름/날짜/부서만 다른 자주 묻는 질문 유형이면 슬롯을 채워 gpt-4o 호출 생략
+    use_templates = settings.SQL_TEMPLATE_ENABLED and not history_referenced
+    sql_context = {name: state[name] for name in CONTEXT_SLOTS}
+    if use_templates:
+        template_sql = await sql_template_library.match(state["question"], sql_context, state.get("embedding_context"))
+        if template_sql:
+            result = await rls_session.execute(template_sql)
+            if "Error:" not in result:
+                # 실제 데이터가 조회된 SQL만 플랜 캐시에 저장 (권한 없음 / 데이터 없음 응답 제외)
+                if use_plan_cache and result.startswith(RESULT_PREFIX):
+                    await sql_plan_cache.set(state["question"], template_sql, state["employee_id"], state["company_email"], *plan_args[1:])
+                return {"rdb_result": result, "generated_sql": template_sql}
+            print(f" !! [SQL Template] 실행 실패, LLM으로 생성: {result}")
+    
     query_keywords = " ".join(state["optimized_sql_keywords"])
     
-    # 유사도 높은 상위 5개 테이블에 대한 DDL 추출
-    ddl_context = await search_schema_and_get_ddl(query_keywords)
+    # 유사도 높은 상위 테이블의 DDL + DDL에 없는 관련 테이블 인벤토리 (토큰 예산 적용)
+    actual_schema_context, ddl_context = await build_sql_schema_context(
+        query_keywords, state["optimized_sql_keywords"], state.get("embedding_context")
+    )
     
     # SQL 재시도 횟수
     max_retries = 3 
@@ -198,9 +263,6 @@ async def sql_agent_node(state: AgentState):
     # 구조화된 출력 적용
     structured_llm = llm_gpt4o.with_structured_output(SQLGenerationResponse)
     
-    # DB 스키마 JSON
-    actual_schema_context = get_schema_inventory_text()
-    
     # 사용자 <> LLM 답변 이전 대화 기록 정보
     history = state.get("history", "")
     recent = history[-4:]  # 이전 기록 중, 질문-답변 2쌍만 추출
@@ -244,7 +306,7 @@ async def sql_agent_node(state: AgentState):
         - 사용자 상위 부서 코드 : {state['parent_department']}
         - 사용자 사내 이메일 : {state['company_email']}
         
-        - 전체 테이블 스키마
+        - 그 밖의 관련 테이블 스키마
         {actual_schema_context}
         
         - SQL 생성 시, 참고해야하는 유사도 높은 상위 5개 테이블의 DDL:
@@ -267,22 +329,36 @@ async def sql_agent_node(state: AgentState):
         #print(f"  [Thought]: {response['thought']}")
         #print(f"  [Generated SQL]: {response['sql']}")
 
+        # 로컬 사전 검증 (문법 / 조회 전용 / 테이블·컬럼 존재) : 실패 시 DB 왕복 없이 바로 재시도
+        if settings.SQL_VALIDATION_ENABLED:
+            validation_error = validate_sql(response['sql'])
+            if validation_error:
+                metrics.incr("sql_agent.retries")
+                last_error = f"쿼리: {response['sql']} \n에러 메시지: SQL Validation Error: {validation_error}"
+                print(f" !! [Retry {i+1}] 사전 검증 실패: {validation_error}")
+                continue
+
         # 실행
-        result = await execute_sql_query(
-            response['sql'],
-            state['employee_id'],
-            state["department_code"], 
-            state["parent_department"], 
-            state["job_rank_id"]
-        )
+        result = await rls_session.execute(response['sql'])
 
-        # 정상 실행 시, 결과 반환
+        # 정상 실행 시, SQL 플랜 캐시 저장 후 결과 반환
         if "Error:" not in result:
+            # 실제 데이터가 조회된 SQL만 플랜 캐시 저장 / 템플릿 학습 (권한 없음 / 데이터 없음 응답 제외)
+            data_returned = result.startswith(RESULT_PREFIX)
+            if use_plan_cache and data_returned:
+                await sql_plan_cache.set(
+                    state["question"], response['sql'], state["employee_id"], state["company_email"],
+                    state["job_rank_id"], state["department_code"], state["parent_department"]
+                )
+            if use_templates and data_returned:
+                await sql_template_library.learn(state["question"], response['sql'], sql_context, state.get("embedding_context"))
             return {"rdb_result": result, "generated_sql": response['sql']}
         
+        metrics.incr("sql_agent.retries")
         last_error = f"쿼리: {response['sql']} \n에러 메시지: {result}"
         print(f" !! [Retry {i+1}] 에러 발생: {result}")
 
+    metrics.incr("sql_agent.failures")
     return {"rdb_result": "SQL 실행 실패. 관리자에게 문의하세요."}
 
 # 2. 비정형 데이터 처리 
@@ -293,8 +369,18 @@ async def vector_search_node(state: AgentState):
     # sql_keywords: Router가 추출한 핵심 명사들 (필터링용)
     filter_keywords = state.get("optimized_sql_keywords", [])
     
-    # 하이브리드 검색 수행 (Nori, pg_trgm, Rerank 로직은 tools.py 내장)
-    docs = await hybrid_vector_search(query, state["department_code"], filter_keywords)
+    # Router와 동시에 원본 질문으로 미리 실행한 벡터 leg 결과
+    # - 검색어가 같으면 벡터 leg 대신 사용, 다르면 RRF 보조 순위 목록으로 사용 (없으면 hybrid_vector_search에서 직접 실행)
+    prefetch = state.get("prefetch")
+    prefetched_rows, same_query = await prefetch.take("vector", key=query) if prefetch is not None else (None, False)
+    vector_rows = prefetched_rows if same_query else None
+    extra_rows = prefetched_rows if not same_query else None
+    
+    # 하이브리드 검색 수행 (pg_trgm, 권한 범위 필터, Rerank 로직은 tools.py 내장)
+    docs = await hybrid_vector_search(
+        query, state["department_code"], state["parent_department"], filter_keywords,
+        state.get("embedding_context"), state.get("retrieval_profile"), vector_rows, extra_rows
+    )
     
     return {"vector_result": docs}
 
@@ -334,6 +420,9 @@ async def generator_node(state: AgentState):
     2. 사용자 친화적 명칭: 데이터에 'emp036' 같은 ID만 있고 이름이 없다면 'ID: emp036 직원' 식으로 표현하되, 가급적 자연스러운 문장으로 구성하세요.
     3. 비정형 문서의 결과가 '검색 결과가 없습니다.'인 경우, 해당 문구를 그대로 답변에 포함하지 마세요. 대신 '관련 규정을 찾지 못했습니다.' 등으로 자연스럽게 안내하세요.
     4. 정형 데이터의 status가 forbidden인 경우 '해당 데이터에 대한 접근 권한이 없습니다.'라고 안내하세요.
+    5. 정형 데이터는 columns(컬럼명)와 rows(행 값 배열) 형식입니다. truncated가 true이면 일부 행만 포함된 것이므로, 전체 건수는 total_count 기준으로 안내하세요.
+    6. 정형 데이터에 summary가 있으면 rows는 샘플일 뿐이므로, 합계/평균/분포 등은 summary(numeric: 최소/최대/평균, group_counts: 값별 건수)를 기준으로 답하세요.
+    - summary.complete가 false이면 전체 total_count건 중 앞쪽 summarized_rows건만 집계한 부분 요약입니다. 전체 기준 수치처럼 단정하지 말고 일부 데이터 기준임을 함께 안내하세요.
 
     [정형 데이터 (RDB)]
     {rdb_data if rdb_data else "조회된 데이터 없음"}
@@ -8,8 +8,8 @@ load_dotenv(dotenv_path=env_path)
 
 import json
 import time
-import redis
 import shutil
+import asyncio
 from typing import List
 from datetime import date
 from contextlib import asynccontextmanager
@@ -18,12 +18,21 @@ from fastapi import FastAPI, BackgroundTasks, Depends, status, Form, File, Uploa
 from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.ext.asyncio import AsyncSession
-from faster_whisper import WhisperModel
 
 from app.graph.workflow import app_graph
 from app.core.semantic_cache import SemanticCacheManager
+from app.core.embedding_context import EmbeddingContext
+from app.core.prefetch import RetrievalPrefetch
+from app.core.metrics import metrics
+from app.core.model_registry import model_registry
+from app.core.schema_index import schema_index
+from app.core.schema_catalog import schema_catalog
+from app.core.router_cache import router_cache
+from app.services.sql_templates import sql_template_library
+from app.services.batching import embedding_batcher
+from app.services.reranker import reranker_service
 from app.core.dependencies import check_access_token
-from app.core.database import get_db
+from app.core.database import get_db, redis_client, redis_pool
 from app.utils.file_parser import parse_uploaded_file
 from app.services.member import MemberService
 from app.services import announcement_service, mail_service, meeting_service 
@@ -35,17 +44,27 @@ from app.schemas.model import (
     DailyReservationResponseItem, ReservationCreateRequest, ReservationCancelRequest
 )
 
-# Redis 클라이언트 초기화 및 캐시, 메모리 공유
-redis_client = redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379"), decode_responses=False)
-
 # Redis 설정 및 Semantic Cache 매니저 초기화
+# (redis_client : app.core.database의 redis.asyncio 커넥션 풀 기반 클라이언트를 캐시, 메모리가 공유)
 semantic_cache: SemanticCacheManager = None
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # 서버 시작 시 초기화
     global semantic_cache
     semantic_cache = SemanticCacheManager(redis_client)
+    await semantic_cache.initialize()
+    # RDB 스키마 벡터/DDL을 워커 메모리에 적재 (이후 버전 스탬프 변경 시 자동 재적재)
+    # DB 연결 실패 시에도 서버는 기동하고, 첫 스키마 검색 시점부터 주기적으로 재시도
+    await schema_index.try_load()
+    schema_catalog.inventory_text() # 스키마 인벤토리 JSON 선적재
+    await router_cache.initialize()
+    await sql_template_library.initialize()
     yield
+    # 서버 종료 시 배치 워커 및 Redis 커넥션 풀 정리
+    await embedding_batcher.close()
+    await reranker_service.close()
+    await redis_client.aclose()
+    await redis_pool.disconnect()
 
 # 이전 대화 기록을 위한 메모리 버퍼 설정    
 memory_manager = ConversationMemoryManager(redis_client, window_size=30)    
@@ -125,8 +144,13 @@ async def chat_endpoint(
         file_context_str = await parse_uploaded_file(file)
         print(f"📄 추출된 내용: {file_context_str[:100]}...")
     
-    # Redis 캐시 정보 확인     
-    cached_response = await semantic_cache.search_cache(request.query)
+    # 요청 단위 임베딩 메모 : 캐시 조회/저장, 검색 노드가 같은 질문 벡터를 공유
+    embedding_ctx = EmbeddingContext(embedding_batcher)
+    
+    # Redis 캐시 정보 확인 (같은 권한 범위의 공용 답변 + 본인 사원 단위 답변만 사용)
+    shared_scope = SemanticCacheManager.scope_tag(request.department_code, request.parent_department, request.job_rank_id)
+    employee_scope = SemanticCacheManager.scope_tag(request.department_code, request.parent_department, request.job_rank_id, request.employee_id)
+    cached_response = await semantic_cache.search_cache(request.query, [shared_scope, employee_scope], embedding_ctx=embedding_ctx)
     
     if cached_response:
         # 캐시 히트 시: 저장된 텍스트를 스트리밍 형식으로 반환
@@ -143,6 +167,10 @@ async def chat_endpoint(
     async def event_generator():
         final_output = ""
         is_first_chunk = True
+        # 정형 데이터(RDB) 사용 여부 : RLS가 사원 ID까지 주입하므로 결과가 사원 단위일 수 있음
+        rdb_used = False
+        # Router와 동시에 시작하는 추측 검색 작업 보관소
+        prefetch = RetrievalPrefetch()
         
         # LangGraph astream_events 사용하여 토큰 단위 스트리밍
         inputs = {
@@ -153,76 +181,90 @@ async def chat_endpoint(
             "parent_department" : request.parent_department,
             "company_email" : request.company_email,
             "file_context": file_context_str,
-            "history" : history
+            "history" : history,
+            "embedding_context": embedding_ctx,
+            "retrieval_profile": request.retrieval_profile,
+            "prefetch": prefetch
         }
         
-        # app.graph.workflow - LangGraph 실행
-        async for event in app_graph.astream_events(inputs, version="v1"):
-            kind = event["event"]
-            node_name = event["metadata"].get("langgraph_node", "Unknown")
+        # 클라이언트 연결 종료 등으로 스트림이 중단되어도 추측 실행 작업은 반드시 정리
+        try:
+            # app.graph.workflow - LangGraph 실행
+            async for event in app_graph.astream_events(inputs, version="v1"):
+                kind = event["event"]
+                node_name = event["metadata"].get("langgraph_node", "Unknown")
             
-            print(f"event : {event}")
-            # ------------------------------------------------------------------
-            # 1. [디버깅] 노드 진입/완료 확인 (Router -> SQL Agent -> ...)
-            # ------------------------------------------------------------------
-            if kind == "on_chain_start" and node_name in ["router", "sql_agent", "vector_search", "generator"]:
-                print(f"  🔄 [Node Start] {node_name} 노드 진입...")
+                print(f"event : {event}")
+                # ------------------------------------------------------------------
+                # 1. [디버깅] 노드 진입/완료 확인 (Router -> SQL Agent -> ...)
+                # ------------------------------------------------------------------
+                if kind == "on_chain_start" and node_name in ["router", "sql_agent", "vector_search", "generator"]:
+                    print(f"  🔄 [Node Start] {node_name} 노드 진입...")
                 
-            elif kind == "on_chain_end" and node_name in ["router", "sql_agent", "vector_search"]:
-                # 각 노드가 뱉어낸 결과값(Output) 확인
-                output_data = event["data"].get("output")
-                if output_data:
-                    # 결과가 너무 길면 앞부분만 출력
-                    print(f"  ✅ [Node End] {node_name} 완료. 결과: {str(output_data)[:100]}...")
-
-            # ------------------------------------------------------------------
-            # 2. [디버깅] Router의 판단 결과 확인
-            # ------------------------------------------------------------------
-            if kind == "on_chain_end" and node_name == "router":
-                router_output = event["data"]["output"]
-                print(f"     👉 Router 판단: {router_output})")
-
-            # ------------------------------------------------------------------
-            # 3. [디버깅] 툴 실행 결과 확인 (SQL 쿼리 결과, 검색된 문서 등)
-            # ------------------------------------------------------------------
-            if kind == "on_tool_end":
-                tool_name = event["name"]
-                tool_output = event["data"].get("output")
-                print(f"     🛠️ [Tool] {tool_name} 실행 완료.")
-                # SQL 쿼리 결과나 검색된 문서 내용 미리보기
-                print(f"        결과: {str(tool_output)[:150]}...")
+                elif kind == "on_chain_end" and node_name in ["router", "sql_agent", "vector_search"]:
+                    # 각 노드가 뱉어낸 결과값(Output) 확인
+                    output_data = event["data"].get("output")
+                    if node_name == "sql_agent" and isinstance(output_data, dict) and output_data.get("rdb_result"):
+                        rdb_used = True
+                    if output_data:
+                        # 결과가 너무 길면 앞부분만 출력
+                        print(f"  ✅ [Node End] {node_name} 완료. 결과: {str(output_data)[:100]}...")
+
+                # ------------------------------------------------------------------
+                # 2. [디버깅] Router의 판단 결과 확인
+                # ------------------------------------------------------------------
+                if kind == "on_chain_end" and node_name == "router":
+                    router_output = event["data"]["output"]
+                    print(f"     👉 Router 판단: {router_output})")
+
+                # ------------------------------------------------------------------
+                # 3. [디버깅] 툴 실행 결과 확인 (SQL 쿼리 결과, 검색된 문서 등)
+                # ------------------------------------------------------------------
+                if kind == "on_tool_end":
+                    tool_name = event["name"]
+                    tool_output = event["data"].get("output")
+                    print(f"     🛠️ [Tool] {tool_name} 실행 완료.")
+                    # SQL 쿼리 결과나 검색된 문서 내용 미리보기
+                    print(f"        결과: {str(tool_output)[:150]}...")
             
-            # ------------------------------------------------------------------
-            # 4. [클라이언트 전송] 최종 답변 스트리밍 (기존 로직)
-            # ------------------------------------------------------------------
-            if kind == "on_chat_model_stream" and node_name == "generator":
-                content = event["data"]["chunk"].content
-                if content:
-                    if is_first_chunk:
-                        print(f"\n 💬 [Streaming Start] >> ", end="", flush=True)
-                        is_first_chunk = False
-                    
-                    # 1. 터미널 로그에 실시간 출력 (줄바꿈 없이)
-                    print(content, end="", flush=True)
+                # ------------------------------------------------------------------
+                # 4. [클라이언트 전송] 최종 답변 스트리밍 (기존 로직)
+                # ------------------------------------------------------------------
+                if kind == "on_chat_model_stream" and node_name == "generator":
+                    content = event["data"]["chunk"].content
+                    if content:
+                        if is_first_chunk:
+                            print(f"\n 💬 [Streaming Start] >> ", end="", flush=True)
+                            is_first_chunk = False
                     
-                    # 2. 데이터 누적
-                    final_output += content
+                        # 1. 터미널 로그에 실시간 출력 (줄바꿈 없이)
+                        print(content, end="", flush=True)
                     
-                    # 3. 프론트엔드로 전송
-                    yield content
+                        # 2. 데이터 누적
+                        final_output += content
                     
+                        # 3. 프론트엔드로 전송
+                        yield content
+        finally:
+            # 소비되지 않은 추측 실행 작업 정리
+            prefetch.cancel_all()
+
         end_time = time.perf_counter()
         total_duration = end_time - start_time            
         
         if not is_first_chunk:
             print("\n ✅ [Streaming End] : Total Runtime {:.2f} seconds".format(total_duration))
+        print(f"  🧮 [Embedding Memo] {embedding_ctx.stats()}")
             
         # Redis 캐시 저장(만료 시간 1시간) 및 메모리에 대화 내용 기록
         if final_output:
             background_tasks.add_task(
                 semantic_cache.store_cache, 
                 query_text=request.query, 
-                response_text=final_output
+                response_text=final_output,
+                # 정형 데이터가 들어간 답변은 RLS(app.current_employee_id) 결과일 수 있으므로 본인에게만 재사용
+                scope=employee_scope if rdb_used else shared_scope,
+                embedding_ctx=embedding_ctx
             )
             background_tasks.add_task(
                 memory_manager.add_message, 
@@ -241,6 +283,12 @@ async def chat_endpoint(
     return StreamingResponse(event_generator(), media_type="text/event-stream")
 
 
+@app.get("/metrics")
+async def read_metrics():
+    """워커 단위 성능 지표 조회 (캐시 히트율, 구간별 소요 시간, 모델별 상주 메모리 등)"""
+    return {**metrics.snapshot(), "models": model_registry.memory_report()}
+
+
 @app.get("/announcements", response_model=List[AnnouncementListResponse])
 async def read_announcements(
     parent_department_code: str = Query(..., description="상위 부서 코드"),
@@ -336,25 +384,6 @@ async def delete_reservation(
     return await meeting_service.delete_reservation(db, request.reservation_id_list, request.employee_id)
 
 
-
-
-# 모델 크기 옵션: "tiny", "base", "small", "medium", "large-v3"
-# device="cuda" (GPU 사용 시), device="cpu" (CPU 사용 시)
-# compute_type="float16" (GPU), compute_type="int8" (CPU)
-MODEL_SIZE = "medium" 
-try:
-    # GPU가 있으면 GPU로, 없으면 CPU로 설정하는 로직 (원하는 대로 고정해도 됨)
-    import torch
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-    compute_type = "float16" if device == "cuda" else "int8"
-except ImportError:
-    device = "cpu"
-    compute_type = "int8"
-
-print(f"Loading Faster Whisper model '{MODEL_SIZE}' on {device} with {compute_type}...")
-model = WhisperModel(MODEL_SIZE, device=device, compute_type=compute_type)
-print("Model loaded successfully.")
-
 @app.post("/stt")
 async def speech_to_text(file: UploadFile = File(...)):
     """
@@ -371,6 +400,8 @@ async def speech_to_text(file: UploadFile = File(...)):
             shutil.copyfileobj(file.file, buffer)
         
         # 4. Transcribe (변환) 수행
+        # Whisper 모델은 최초 요청 시 로드 (로드 중 이벤트 루프가 막히지 않도록 스레드에서 실행)
+        model = await asyncio.to_thread(model_registry.get_whisper)
         # segments는 제너레이터이므로 리스트로 변환하거나 반복문으로 텍스트 추출
         segments, info = model.transcribe(temp_filename, beam_size=5, language="ko", vad_filter=True, temperature=0.0, condition_on_previous_text=False)
         
@@ -2,6 +2,8 @@ from typing import TypedDict, List, Optional, Literal, Union, Dict
 from pydantic import BaseModel, Field, EmailStr, field_validator
 from datetime import date
 from typing import Optional
+from app.core.embedding_context import EmbeddingContext
+from app.core.prefetch import RetrievalPrefetch
 
 # LangGraph 스키마
 class AgentState(TypedDict):
@@ -13,14 +15,18 @@ class AgentState(TypedDict):
     company_email : str           # 사용자 이메일
     file_context: str             # 업로드 파일
     history: List[Dict[str, str]] # 이전 대화 기록
+    embedding_context: EmbeddingContext # 요청 단위 임베딩 메모
+    retrieval_profile: Optional[str]    # 문서 검색 프로필 (fast / balanced / exhaustive)
+    prefetch: RetrievalPrefetch         # Router와 동시에 시작한 추측 검색 작업
     
     # Router Outputs
-    intent: Literal["rdb", "vector", "both"]
+    intent: Literal["rdb", "vector", "both", "other"]
     optimized_sql_keywords: List[str]  # Text-to-SQL용 키워드
     optimized_vector_query: str        # Vector Search용 확장 쿼리
     
     # Tool Outputs
     rdb_result: Optional[str]
+    generated_sql: Optional[str]       # 실행에 성공한 SQL (LLM / 플랜 캐시 / 템플릿)
     vector_result: Optional[str]
     
     # Final Output
@@ -28,7 +34,7 @@ class AgentState(TypedDict):
 
 # 정형/비정형 경로를 위한 Router 스키마
 class RouterOutput(BaseModel):
-    intent: Literal["rdb", "vector", "both"] = Field(description="데이터 조회 경로 선택")
+    intent: Literal["rdb", "vector", "both", "other"] = Field(description="데이터 조회 경로 선택")
     sql_keywords: List[str] = Field(description="SQL 생성을 위한 핵심 명사/키워드 리스트")
     vector_query: str = Field(description="유의어가 포함된 자연어 검색 쿼리")
 
@@ -40,6 +46,7 @@ class ChatRequest(BaseModel):
     department_code: str        # 부서코드
     parent_department: str      # 상위부서코드
     company_email : str       # 사용자 이메일
+    retrieval_profile: Optional[Literal["fast", "balanced", "exhaustive"]] = None # 문서 검색 프로필 (미지정 시 서버 기본값)
 
 # 회원가입 요청 스키마    
 class Member(BaseModel):
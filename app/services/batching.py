@@ -0,0 +1,100 @@
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Optional
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.model_registry import model_registry
+
+# 동시 요청(코루틴)들의 개별 입력을 짧은 시간 모아 한 번의 배치로 처리하는 공통 베이스
+# - submit() 호출자는 Future로 자신의 결과만 돌려받음
+# - 배치 추론은 전용 스레드 풀에서 실행하여 이벤트 루프를 막지 않음
+# - 하위 클래스는 _process_batch(items) -> results 만 구현
+class MicroBatcher:
+    def __init__(self, name: str, max_batch_size: int, max_wait_ms: float, executor_workers: int = 1):
+        self.name = name
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._executor = ThreadPoolExecutor(max_workers=executor_workers, thread_name_prefix=name)
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _process_batch(self, items: List[Any]) -> List[Any]:
+        raise NotImplementedError
+
+    # 현재 이벤트 루프에 배치 워커가 없으면 생성
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, item: Any) -> Any:
+        self._ensure_worker()
+        future = self._loop.create_future()
+        self._queue.put_nowait((item, future))
+        return await future
+
+    def _drain(self, batch: list):
+        while len(batch) < self.max_batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            self._drain(batch)
+            # 배치가 덜 찼다면 max_wait 동안 다른 코루틴의 입력을 더 기다림
+            if len(batch) < self.max_batch_size and self.max_wait > 0:
+                await asyncio.sleep(self.max_wait)
+                self._drain(batch)
+
+            # 기다리는 동안 취소된 호출은 제외
+            live = [(item, future) for item, future in batch if not future.cancelled()]
+            if not live:
+                continue
+
+            start = time.perf_counter()
+            try:
+                results = await self._loop.run_in_executor(self._executor, self._process_batch, [item for item, _ in live])
+            except Exception as e:
+                print(f"❌ [{self.name}] 배치 처리 실패: {e}")
+                for _, future in live:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            metrics.incr(f"{self.name}.batches")
+            metrics.incr(f"{self.name}.items", len(live))
+            metrics.observe(f"{self.name}.batch_seconds", time.perf_counter() - start)
+
+            for (_, future), result in zip(live, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        self._executor.shutdown(wait=False)
+
+
+# 임베딩(KURE-v1) 마이크로 배치 서비스
+# aembed_query 시그니처를 제공하므로 임베딩 모델 자리에 그대로 사용 가능
+class EmbeddingBatcher(MicroBatcher):
+    def __init__(self, max_batch_size: int, max_wait_ms: float):
+        super().__init__("embedding_batcher", max_batch_size, max_wait_ms)
+
+    def _process_batch(self, texts: List[str]) -> List[List[float]]:
+        # sentence-transformers가 배치 내 문장을 길이 기준으로 정렬/패딩하여 한 번에 forward
+        return model_registry.get_embeddings().embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self.submit(text)
+
+embedding_batcher = EmbeddingBatcher(settings.EMBEDDING_BATCH_MAX_SIZE, settings.EMBEDDING_BATCH_MAX_WAIT_MS)
@@ -1,6 +1,6 @@
 from langchain_openai import AzureChatOpenAI
-from langchain_huggingface import HuggingFaceEmbeddings # 변경된 import
 from app.core.config import settings
+from app.core.model_registry import model_registry
 
 def get_llm(model_name: str = "gpt-4o"):
     # 매개변수에 따라, Open AI 모델 다르게 생성하여 리턴
@@ -12,12 +12,6 @@ def get_llm(model_name: str = "gpt-4o"):
         streaming=True # 토큰별 실시간 응답을 위함
     )
 
+# 워커 내 공유 임베딩 모델(KURE-v1) 반환. 최초 호출 시에만 로드
 def get_embeddings():
-    model_kwargs = {'device': settings.EMBEDDING_DEVICE}
-    encode_kwargs = {'normalize_embeddings': True} # 코사인 유사도 검색 시 정규화 권장
-
-    return HuggingFaceEmbeddings(
-        model_name=settings.EMBEDDING_MODEL_NAME,
-        model_kwargs=model_kwargs,
-        encode_kwargs=encode_kwargs
-    )
\ No newline at end of file
+    return model_registry.get_embeddings()
\ No newline at end of file
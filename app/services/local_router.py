@@ -0,0 +1,161 @@
+import os
+import json
+import time
+import asyncio
+import threading
+from datetime import datetime
+from typing import List, Optional
+import numpy as np
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.embedding_context import EmbeddingContext
+from app.services.batching import embedding_batcher
+from app.utils.question import normalize_question, extract_keywords
+
+# KURE-v1 임베딩 기반 로컬 의도 분류기 (유사도 가중 kNN)
+# - 학습 데이터 : LLM Router 결정 로그(ROUTER_LOG_PATH)를 app/test/train_local_router.py 로 npz 변환
+# - 최근접 질문과의 유사도와 득표율이 모두 기준 이상일 때만 RouterOutput을 직접 반환하고, 아니면 LLM으로 넘김
+# - sql_keywords / vector_query는 사실상 같은 질문(LOCAL_ROUTER_REUSE_SIMILARITY 이상)일 때만 이웃 것을 재사용하고,
+#   그 외에는 의도만 사용하고 키워드/검색어는 현재 질문에서 만듦 (다른 질문의 하드 필터가 섞이지 않도록)
+# - 모델 파일 mtime이 바뀌면 다시 적재 (서버 재시작 없이 재학습 반영)
+class LocalIntentRouter:
+    def __init__(self, model_path: str, log_path: str, k: int, confidence: float, min_similarity: float, reuse_similarity: float):
+        self.model_path = model_path
+        self.log_path = log_path
+        self.k = k
+        self.confidence = confidence
+        self.min_similarity = min_similarity
+        self.reuse_similarity = reuse_similarity
+        self._mtime: Optional[int] = None
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._intents: List[str] = []
+        self._keywords: List[str] = []
+        self._vector_queries: List[str] = []
+        self._log_lock = threading.Lock()
+
+    def _ensure_loaded(self) -> bool:
+        try:
+            mtime = os.stat(self.model_path).st_mtime_ns
+        except OSError:
+            return False
+
+        if mtime != self._mtime:
+            try:
+                data = np.load(self.model_path)
+                self._vectors = data["vectors"].astype(np.float32)
+                self._intents = data["intents"].tolist()
+                self._keywords = data["sql_keywords"].tolist()
+                self._vector_queries = data["vector_queries"].tolist()
+                print(f"🧭 [Local Router] {len(self._intents)}개 질문 적재 완료")
+            except Exception as e:
+                print(f"[Local Router Load Error] {e}")
+            self._mtime = mtime
+        return len(self._intents) > 0
+
+    # 질문 벡터 1개를 분류. 확신도가 기준 미만이면 None
+    def classify(self, query_vector: List[float]) -> Optional[dict]:
+        if not self._ensure_loaded():
+            return None
+
+        query = np.asarray(query_vector, dtype=np.float32)
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+        similarities = self._vectors @ query
+        k = min(self.k, len(similarities))
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top])]
+        if similarities[top[0]] < self.min_similarity:
+            return None
+
+        # 유사도 가중 투표
+        votes = {}
+        for i in top:
+            votes[self._intents[i]] = votes.get(self._intents[i], 0.0) + max(float(similarities[i]), 0.0)
+        intent, score = max(votes.items(), key=lambda item: item[1])
+        confidence = score / max(sum(votes.values()), 1e-12)
+        if confidence < self.confidence:
+            return None
+
+        result = {
+            "intent": intent,
+            "sql_keywords": None,
+            "vector_query": None,
+            "confidence": confidence,
+            "similarity": float(similarities[top[0]]),
+        }
+        # 같은 의도로 분류된 가장 가까운 질문이 사실상 같은 질문이면 키워드 / 검색어 확장 재사용
+        neighbor = next(i for i in top if self._intents[i] == intent)
+        if similarities[neighbor] >= self.reuse_similarity:
+            result["sql_keywords"] = json.loads(self._keywords[neighbor])
+            result["vector_query"] = self._vector_queries[neighbor]
+        return result
+
+    async def route(self, question: str, embedding_ctx: Optional[EmbeddingContext] = None) -> Optional[dict]:
+        if not settings.LOCAL_ROUTER_ENABLED:
+            return None
+
+        start = time.perf_counter()
+        query_vector = await (embedding_ctx or embedding_batcher).aembed_query(question)
+        result = self.classify(query_vector)
+        metrics.observe("local_router.seconds", time.perf_counter() - start)
+        metrics.incr("local_router.hits" if result else "local_router.fallbacks")
+
+        if result is None:
+            return None
+        if result["sql_keywords"] is None:
+            metrics.incr("local_router.intent_only")
+            result["sql_keywords"] = [] if result["intent"] == "other" else extract_keywords(question)
+            result["vector_query"] = question
+        elif result["vector_query"]:
+            # 이웃 질문의 확장 검색어 앞에 현재 질문을 붙여 검색 의도를 유지
+            result["vector_query"] = f"{question} {result['vector_query']}"
+        return result
+
+    # 로그 크기 상한 초과 시 회전 (router_decisions.jsonl -> .1 -> .2 ..., 가장 오래된 백업은 삭제)
+    def _rotate_log(self):
+        backups = settings.ROUTER_LOG_BACKUPS
+        if backups <= 0:
+            os.remove(self.log_path)
+            return
+        for i in range(backups - 1, 0, -1):
+            src = f"{self.log_path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.log_path}.{i + 1}")
+        os.replace(self.log_path, f"{self.log_path}.1")
+
+    def _append_log(self, record: dict):
+        os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+        with self._log_lock:
+            try:
+                if os.path.getsize(self.log_path) >= settings.ROUTER_LOG_MAX_BYTES:
+                    self._rotate_log()
+            except OSError:
+                pass
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    # LLM Router 결정을 재학습용으로 기록
+    async def log_decision(self, question: str, result: dict, is_file_uploaded: bool, history_referenced: bool, latency: float):
+        record = {
+            "question": question,
+            "normalized_question": normalize_question(question),
+            "intent": result["intent"],
+            "sql_keywords": result["sql_keywords"],
+            "vector_query": result["vector_query"],
+            "is_file_uploaded": is_file_uploaded,
+            "references_history": history_referenced,
+            "llm_latency_ms": round(latency * 1000, 1),
+            "logged_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        try:
+            await asyncio.to_thread(self._append_log, record)
+        except Exception as e:
+            print(f"[Router Log Error] {e}")
+
+local_router = LocalIntentRouter(
+    settings.LOCAL_ROUTER_MODEL_PATH,
+    settings.ROUTER_LOG_PATH,
+    settings.LOCAL_ROUTER_K,
+    settings.LOCAL_ROUTER_CONFIDENCE,
+    settings.LOCAL_ROUTER_MIN_SIMILARITY,
+    settings.LOCAL_ROUTER_REUSE_SIMILARITY,
+)
@@ -1,8 +1,9 @@
 # app/services/memory.py
 import json
+import redis.asyncio as redis
 
 class ConversationMemoryManager:
-    def __init__(self, redis_client, window_size=10):
+    def __init__(self, redis_client: redis.Redis, window_size=10):
         self.r = redis_client
         self.window_size = window_size  # 버퍼 사이즈 설정 (최근 N개 메시지)
         self.prefix = "history:"
@@ -10,7 +11,7 @@ class ConversationMemoryManager:
     async def get_history(self, session_id: str):
         # Redis에서 최근 N개의 대화 내역 가져오기
         key = f"{self.prefix}{session_id}"
-        history_data = self.r.lrange(key, 0, self.window_size - 1)
+        history_data = await self.r.lrange(key, 0, self.window_size - 1)
         # JSON 문자열을 리스트로 변환하여 반환
         return [json.loads(h) for h in reversed(history_data)]
 
@@ -18,8 +19,8 @@ class ConversationMemoryManager:
         key = f"{self.prefix}{session_id}"
         message = json.dumps({"role": role, "content": content}, ensure_ascii=False)
         
-        pipe = self.r.pipeline()
-        pipe.lpush(key, message) # 앞에 삽입
-        pipe.ltrim(key, 0, self.window_size - 1) # 버퍼 사이즈 초과분 삭제
-        pipe.expire(key, 604800) # 일주일 TTL 설정
-        pipe.execute()
\ No newline at end of file
+        async with self.r.pipeline() as pipe:
+            pipe.lpush(key, message) # 앞에 삽입
+            pipe.ltrim(key, 0, self.window_size - 1) # 버퍼 사이즈 초과분 삭제
+            pipe.expire(key, 604800) # 일주일 TTL 설정
+            await pipe.execute()
\ No newline at end of file
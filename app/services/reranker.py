@@ -0,0 +1,142 @@
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import torch
+import redis.asyncio as redis
+from app.core.config import settings
+from app.core.database import redis_client
+from app.core.metrics import metrics
+from app.core.model_registry import model_registry
+from app.services.batching import MicroBatcher
+
+# Reranker(bge-reranker ONNX INT8) 비동기 스코어링 서비스
+# - 동시 요청들의 (query, doc) 쌍을 하나의 큐로 모아 전용 스레드에서 추론
+# - 배치 내부는 길이가 비슷한 쌍끼리 버킷으로 묶어 패딩 낭비를 줄임
+class RerankerService(MicroBatcher):
+    def __init__(self, max_batch_size: int, max_wait_ms: float, bucket_size: int, max_length: int):
+        super().__init__("reranker", max_batch_size, max_wait_ms)
+        self.bucket_size = bucket_size
+        self.max_length = max_length
+        # 쌍 1개당 평균 추론 시간(EWMA). 캐시 히트로 절약한 시간 추정에 사용
+        self.avg_pair_seconds = 0.0
+
+    def _process_batch(self, pairs: List[Tuple[str, str]]) -> List[float]:
+        start = time.perf_counter()
+        tokenizer, model = model_registry.get_reranker()
+
+        # 길이 순으로 정렬 후 bucket_size 단위로 추론 (원래 순서로 점수 복원)
+        order = sorted(range(len(pairs)), key=lambda i: len(pairs[i][0]) + len(pairs[i][1]))
+        scores = [0.0] * len(pairs)
+        for offset in range(0, len(order), self.bucket_size):
+            bucket = order[offset:offset + self.bucket_size]
+            inputs = tokenizer(
+                [list(pairs[i]) for i in bucket],
+                padding=True, truncation=True, return_tensors="pt", max_length=self.max_length
+            )
+            with torch.no_grad():
+                logits = model(**inputs).logits.view(-1,).float().tolist()
+            for i, score in zip(bucket, logits):
+                scores[i] = score
+
+        pair_seconds = (time.perf_counter() - start) / len(pairs)
+        self.avg_pair_seconds = pair_seconds if self.avg_pair_seconds == 0 else 0.9 * self.avg_pair_seconds + 0.1 * pair_seconds
+        return scores
+
+    # 질문 1개와 문서 N개의 관련도 점수 (documents 순서 유지)
+    async def score(self, query: str, documents: List[str]) -> List[float]:
+        return list(await asyncio.gather(*[self.submit((query, doc)) for doc in documents]))
+
+reranker_service = RerankerService(
+    settings.RERANKER_BATCH_MAX_PAIRS,
+    settings.RERANKER_BATCH_MAX_WAIT_MS,
+    settings.RERANKER_BUCKET_SIZE,
+    settings.RERANKER_MAX_LENGTH,
+)
+
+
+# Reranker 점수 캐시 : (정규화된 질문, 청크 내용 해시) -> 점수
+# - 1차 : 워커 내 LRU (OrderedDict)
+# - 2차 : Redis (선택). 워커 간 점수 공유
+class RerankScoreCache:
+    def __init__(self, max_size: int, redis_client: Optional[redis.Redis] = None, ttl: int = 86400):
+        self.max_size = max_size
+        self.r = redis_client
+        self.ttl = ttl
+        self.prefix = "rerank:"
+        self._lru: "OrderedDict[str, float]" = OrderedDict()
+        # 모델/토큰 길이가 바뀌면 점수가 달라지므로 키 네임스페이스에 포함
+        self._namespace = hashlib.sha1(f"{settings.RERANKER_MODEL_DIR}|{settings.RERANKER_MAX_LENGTH}".encode()).hexdigest()[:8]
+
+    def make_key(self, query: str, document: str) -> str:
+        normalized_query = " ".join(query.split()).lower()
+        query_hash = hashlib.sha1(normalized_query.encode("utf-8")).hexdigest()[:16]
+        doc_hash = hashlib.sha1(document.encode("utf-8")).hexdigest()[:16]
+        return f"{self._namespace}:{query_hash}:{doc_hash}"
+
+    def _remember(self, key: str, score: float):
+        self._lru[key] = score
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_size:
+            self._lru.popitem(last=False)
+
+    async def get_many(self, keys: List[str]) -> Dict[str, float]:
+        found = {}
+        missing = []
+        for key in keys:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                found[key] = self._lru[key]
+            else:
+                missing.append(key)
+
+        if missing and self.r is not None:
+            try:
+                values = await self.r.mget([f"{self.prefix}{key}" for key in missing])
+                for key, value in zip(missing, values):
+                    if value is not None:
+                        found[key] = float(value)
+                        self._remember(key, found[key])
+            except Exception as e:
+                print(f"[Rerank Cache Redis Error] {e}")
+        return found
+
+    async def set_many(self, scores: Dict[str, float]):
+        for key, score in scores.items():
+            self._remember(key, score)
+
+        if scores and self.r is not None:
+            try:
+                async with self.r.pipeline(transaction=False) as pipe:
+                    for key, score in scores.items():
+                        pipe.setex(f"{self.prefix}{key}", self.ttl, repr(score))
+                    await pipe.execute()
+            except Exception as e:
+                print(f"[Rerank Cache Redis Error] {e}")
+
+rerank_score_cache = RerankScoreCache(
+    settings.RERANK_CACHE_MAX_SIZE,
+    redis_client if settings.RERANK_CACHE_REDIS_ENABLED else None,
+    settings.RERANK_CACHE_TTL_SEC,
+)
+
+# 캐시에 없는 (query, doc) 쌍만 Reranker로 보내고 점수를 documents 순서대로 반환
+async def rerank(query: str, documents: List[str]) -> List[float]:
+    keys = [rerank_score_cache.make_key(query, doc) for doc in documents]
+    cached = await rerank_score_cache.get_many(keys)
+
+    uncached_idx = [i for i, key in enumerate(keys) if key not in cached]
+    hits = len(documents) - len(uncached_idx)
+    metrics.incr("rerank_cache.hits", hits)
+    metrics.incr("rerank_cache.misses", len(uncached_idx))
+    metrics.incr("rerank_cache.saved_seconds", hits * reranker_service.avg_pair_seconds)
+
+    scores = dict(cached)
+    if uncached_idx:
+        new_scores = await reranker_service.score(query, [documents[i] for i in uncached_idx])
+        fresh = {keys[i]: score for i, score in zip(uncached_idx, new_scores)}
+        await rerank_score_cache.set_many(fresh)
+        scores.update(fresh)
+
+    return [scores[key] for key in keys]
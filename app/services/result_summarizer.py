@@ -0,0 +1,140 @@
+from collections import Counter
+from decimal import Decimal
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+
+# 대량 SQL 결과 요약 (생성 프롬프트에 원본 대신 집계 요약 + 샘플 행 전달)
+# - 서버 사이드 커서 배치(partition) 단위로 누적하므로 전체 행을 메모리에 올리지 않음
+# - 수치 컬럼 : 건수 / 최소 / 최대 / 평균 (배치마다 NumPy로 벡터 연산)
+# - 범주 컬럼 : 값별 건수 상위 N개 (고유값이 너무 많은 컬럼은 ID성 컬럼으로 보고 집계 중단)
+# - 스트리밍한 행만 집계하므로, 비용 가드 LIMIT으로 잘린 결과는 summarize_in_database로 원본 SQL 전체를 DB에서 집계
+class ResultDigest:
+    def __init__(self, columns: Sequence[str]):
+        self.columns = list(columns)
+        self.row_count = 0
+        # 컬럼 유형은 처음 나온 NULL이 아닌 값으로 결정 (SQL 결과 컬럼은 타입이 고정)
+        self._numeric: Dict[int, dict] = {}
+        self._categories: Dict[int, Counter] = {}
+        self._skipped = set()
+        self._nulls = [0] * len(self.columns)
+
+    @staticmethod
+    def _is_number(value) -> bool:
+        return isinstance(value, (int, float, Decimal)) and not isinstance(value, bool)
+
+    def add_partition(self, rows: Sequence[Sequence]):
+        if not rows:
+            return
+        self.row_count += len(rows)
+
+        for i, values in enumerate(zip(*rows)):
+            present = [v for v in values if v is not None]
+            self._nulls[i] += len(values) - len(present)
+            if not present or i in self._skipped:
+                continue
+
+            if i in self._numeric or (i not in self._categories and self._is_number(present[0])):
+                arr = np.fromiter((float(v) for v in present), dtype=np.float64, count=len(present))
+                stats = self._numeric.setdefault(i, {"count": 0, "min": np.inf, "max": -np.inf, "sum": 0.0})
+                stats["count"] += arr.size
+                stats["min"] = min(stats["min"], float(arr.min()))
+                stats["max"] = max(stats["max"], float(arr.max()))
+                stats["sum"] += float(arr.sum())
+                continue
+
+            counter = self._categories.setdefault(i, Counter())
+            counter.update(str(v) for v in present)
+            # 고유값이 많은 컬럼(ID, 이름, 날짜 등)은 그룹 집계 의미가 없으므로 제외
+            if len(counter) > settings.SQL_SUMMARY_MAX_DISTINCT:
+                del self._categories[i]
+                self._skipped.add(i)
+
+    @property
+    def numeric_columns(self) -> List[str]:
+        return [self.columns[i] for i in self._numeric]
+
+    @property
+    def category_columns(self) -> List[str]:
+        return [self.columns[i] for i in self._categories]
+
+    # complete : 전체 결과 행을 집계했는지 여부 (False면 앞쪽 summarized_rows건만 집계한 부분 요약)
+    def to_dict(self, complete: bool = True) -> dict:
+        top_n = settings.SQL_SUMMARY_TOP_N
+        numeric = {
+            self.columns[i]: {
+                "count": s["count"],
+                "min": round(s["min"], 4),
+                "max": round(s["max"], 4),
+                "mean": round(s["sum"] / s["count"], 4),
+            }
+            for i, s in self._numeric.items() if s["count"]
+        }
+        categorical = {
+            self.columns[i]: dict(counter.most_common(top_n))
+            for i, counter in self._categories.items()
+        }
+        nulls = {self.columns[i]: n for i, n in enumerate(self._nulls) if n}
+
+        digest = {"summarized_rows": self.row_count, "complete": complete, "numeric": numeric, "group_counts": categorical}
+        if nulls:
+            digest["nulls"] = nulls
+        return digest
+
+def _quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+# 원본 SQL 전체를 대상으로 DB에서 같은 형식의 요약 집계 (컬럼 유형은 스트리밍한 행으로 판단한 것을 사용)
+# RLS 컨텍스트가 설정된 같은 트랜잭션에서 호출. 실패 시 None (호출부에서 부분 요약 사용)
+async def summarize_in_database(session: AsyncSession, original_sql: str, digest: ResultDigest) -> Optional[dict]:
+    source = f"(\n{original_sql}\n) AS _summary"
+    select_items = ["COUNT(*)"]
+    for name in digest.columns:
+        select_items.append(f"COUNT({_quote_identifier(name)})")
+    for name in digest.numeric_columns:
+        column = _quote_identifier(name)
+        select_items += [f"MIN({column})", f"MAX({column})", f"AVG({column})"]
+
+    try:
+        async with session.begin_nested():
+            row = (await session.execute(text(f"SELECT {', '.join(select_items)} FROM {source}"))).one()
+            group_counts = {}
+            for name in digest.category_columns:
+                column = _quote_identifier(name)
+                result = await session.execute(
+                    text(f"SELECT CAST({column} AS text), COUNT(*) FROM {source} WHERE {column} IS NOT NULL GROUP BY 1 ORDER BY 2 DESC LIMIT :top_n"),
+                    {"top_n": settings.SQL_SUMMARY_TOP_N}
+                )
+                group_counts[name] = {value: count for value, count in result.fetchall()}
+    except Exception as e:
+        print(f"[SQL Result] DB 요약 집계 실패, 부분 요약 사용: {e}")
+        return None
+
+    total = int(row[0])
+    non_null = dict(zip(digest.columns, row[1:1 + len(digest.columns)]))
+    stats = row[1 + len(digest.columns):]
+    numeric = {}
+    for i, name in enumerate(digest.numeric_columns):
+        low, high, mean = stats[i * 3:i * 3 + 3]
+        if non_null[name]:
+            numeric[name] = {
+                "count": int(non_null[name]),
+                "min": round(float(low), 4),
+                "max": round(float(high), 4),
+                "mean": round(float(mean), 4),
+            }
+    summary = {"summarized_rows": total, "complete": True, "numeric": numeric, "group_counts": group_counts}
+    nulls = {name: total - int(count) for name, count in non_null.items() if total - int(count)}
+    if nulls:
+        summary["nulls"] = nulls
+    return summary
+
+# 결과 행 수가 임계값을 넘으면 요약 모드 적용
+def should_summarize(total_count: int) -> bool:
+    return settings.SQL_SUMMARY_ENABLED and total_count > settings.SQL_SUMMARY_THRESHOLD_ROWS
+
+# 요약 모드 샘플 행 (쿼리의 ORDER BY 순서를 따르는 앞쪽 N행)
+def sample_rows(rows: List, limit: int = None) -> List:
+    return rows[:limit or settings.SQL_SUMMARY_SAMPLE_ROWS]
@@ -0,0 +1,92 @@
+from functools import lru_cache
+from typing import List, Optional, Tuple
+import tiktoken
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.embedding_context import EmbeddingContext
+from app.core.schema_index import schema_index
+from app.core.schema_catalog import schema_catalog, bare_table_name
+from app.services.batching import embedding_batcher
+
+# gpt-4o / gpt-4o-mini 토크나이저 (BPE 파일을 받아오므로 import 시점이 아닌 첫 사용 시 로드)
+@lru_cache(maxsize=1)
+def _get_encoding() -> tiktoken.Encoding:
+    return tiktoken.get_encoding("o200k_base")
+
+# 텍스트의 토큰 수 (매번 다른 문자열을 세는 호출부용, 캐시 없음)
+def count_text_tokens(text: str) -> int:
+    return len(_get_encoding().encode(text)) if text else 0
+
+# 프롬프트 조각의 토큰 수 (인벤토리 줄, DDL 등 같은 문자열이 반복되므로 캐시)
+@lru_cache(maxsize=256)
+def count_tokens(text: str) -> int:
+    return count_text_tokens(text)
+
+# 조각을 순서대로 토큰 예산 안에서 채움 (넘치는 조각은 건너뛰고 뒤의 작은 조각은 계속 시도)
+def _fill_budget(fragments: List[str], budget: int) -> Tuple[List[str], int]:
+    selected, used = [], 0
+    for fragment in fragments:
+        tokens = count_tokens(fragment) + 1 # 구분 개행
+        if used + tokens > budget:
+            continue
+        selected.append(fragment)
+        used += tokens
+    return selected, used
+
+# 유사도 순위 테이블 뒤에 코드(마스터) 테이블을 붙여 중복 없이 반환
+# (명칭 조회용 조인 대상이므로 유사도가 낮아도 예산이 남으면 포함)
+def _with_code_tables(tables: List[str]) -> List[str]:
+    ordered = []
+    for table in tables + schema_catalog.code_tables():
+        table = bare_table_name(table)
+        if table not in ordered:
+            ordered.append(table)
+    return ordered
+
+def _report(stage: str, full_tokens: int, pruned_tokens: int):
+    saved = max(full_tokens - pruned_tokens, 0)
+    metrics.incr(f"schema_context.{stage}.tokens_saved", saved)
+    metrics.incr(f"schema_context.{stage}.tokens_sent", pruned_tokens)
+    print(f"✂️ [Schema Context] {stage}: {pruned_tokens}/{full_tokens} tokens (saved {saved})")
+
+async def _ranked_tables(query_text: str, embedding_ctx: Optional[EmbeddingContext], k: int):
+    query_vector = await (embedding_ctx or embedding_batcher).aembed_query(query_text)
+    return await schema_index.search(query_vector, k)
+
+# Router 프롬프트용 스키마 인벤토리 : 질문과 가까운 테이블 + 코드 테이블만 예산 안에서 포함
+async def build_router_schema_context(question: str, embedding_ctx: Optional[EmbeddingContext] = None) -> str:
+    full_text = schema_catalog.inventory_text()
+    if not settings.SCHEMA_CONTEXT_PRUNING:
+        return full_text
+
+    matches = await _ranked_tables(question, embedding_ctx, settings.SCHEMA_CONTEXT_MAX_TABLES)
+    lines = [schema_catalog.inventory_line(table) for table in _with_code_tables([name for name, _, _ in matches])]
+    selected, used = _fill_budget([line for line in lines if line], settings.SCHEMA_ROUTER_TOKEN_BUDGET)
+    # 스키마 인덱스가 비어 있으면 전체 인벤토리로 대체
+    if not selected:
+        return full_text
+
+    _report("router", count_tokens(full_text), used)
+    return "\n".join(selected)
+
+# SQL 프롬프트용 (인벤토리, DDL) : Router가 지목한 테이블 -> 유사도 순으로 DDL을 먼저 채우고,
+# 남은 예산에 DDL이 없는 관련 테이블/코드 테이블의 인벤토리 줄을 채움
+async def build_sql_schema_context(query_text: str, sql_keywords: List[str], embedding_ctx: Optional[EmbeddingContext] = None) -> Tuple[str, str]:
+    matches = await _ranked_tables(query_text, embedding_ctx, max(len(schema_index.ddls), settings.SCHEMA_TOP_K))
+    full_inventory = schema_catalog.inventory_text()
+    full_ddl = "\n\n".join([ddl for _, ddl, _ in matches[:settings.SCHEMA_TOP_K]])
+    if not settings.SCHEMA_CONTEXT_PRUNING or not matches:
+        return full_inventory, full_ddl
+
+    named = {bare_table_name(keyword) for keyword in sql_keywords}
+    ranked = [m for m in matches if bare_table_name(m[0]) in named] + [m for m in matches if bare_table_name(m[0]) not in named]
+
+    ddls, used = _fill_budget([ddl for _, ddl, _ in ranked[:settings.SCHEMA_TOP_K]], settings.SCHEMA_SQL_TOKEN_BUDGET)
+    ddl_tables = {bare_table_name(name) for name, ddl, _ in ranked if ddl in ddls}
+
+    candidates = _with_code_tables([name for name, _, _ in ranked[:settings.SCHEMA_CONTEXT_MAX_TABLES]])
+    lines = [schema_catalog.inventory_line(table) for table in candidates if table not in ddl_tables]
+    inventory, inventory_used = _fill_budget([line for line in lines if line], settings.SCHEMA_SQL_TOKEN_BUDGET - used)
+
+    _report("sql", count_tokens(full_inventory) + count_tokens(full_ddl), used + inventory_used)
+    return "\n".join(inventory), "\n\n".join(ddls)
@@ -0,0 +1,84 @@
+import json
+from typing import Optional, Tuple
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import SqlglotError
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.metrics import metrics
+
+# LLM 생성 SQL 비용 가드
+# - EXPLAIN (FORMAT JSON)으로 플래너 예상 비용 / 행 수 확인 (실행하지 않음)
+# - 예상 비용이 임계값을 넘으면 실행 전에 거부 -> 에러 메시지가 재시도 프롬프트로 전달
+# - LIMIT이 없거나 상한보다 큰 조회는 LIMIT을 주입해 반환 행 수 제한
+# - 문장 타임아웃은 RlsSqlSession의 set_config('statement_timeout', ..., true)로 트랜잭션 단위 적용
+
+# 최상위 LIMIT / FETCH FIRST의 행 수 (숫자 리터럴이 아니면 None)
+def _row_limit_value(clause: exp.Expression) -> Optional[int]:
+    value = clause.args.get("count") if isinstance(clause, exp.Fetch) else clause.expression
+    if isinstance(value, exp.Literal) and value.is_int:
+        return int(value.this)
+    return None
+
+# 최상위 LIMIT / FETCH가 없거나 상한을 넘으면 행 수 제한 적용 (재작성 불필요 시 None)
+# - SQL을 sqlglot으로 다시 렌더링하지 않고 원문을 그대로 사용 (렌더링 과정의 절 누락 / 의미 변경 방지)
+# - 제한 절이 없으면 끝에 LIMIT 추가 (마지막 줄 주석에 묻히지 않도록 줄바꿈 후 추가)
+# - 제한 절이 있지만 상한보다 크거나 값이 식이면 원문을 서브쿼리로 감싸 바깥에 LIMIT 적용
+def apply_row_limit(sql: str, max_rows: int) -> Optional[str]:
+    try:
+        stmt = sqlglot.parse_one(sql, read="postgres")
+    except SqlglotError:
+        return None
+    if not isinstance(stmt, exp.Query):
+        return None
+
+    clauses = [clause for clause in (stmt.args.get("limit"), stmt.args.get("fetch")) if clause is not None]
+    if not clauses:
+        return f"{sql}\nLIMIT {int(max_rows)}"
+    values = [_row_limit_value(clause) for clause in clauses]
+    if all(value is not None and value <= max_rows for value in values):
+        return None
+    return f"SELECT * FROM (\n{sql}\n) AS _guarded LIMIT {int(max_rows)}"
+
+# 플래너 예상치 조회 : (총 비용, 예상 행 수)
+async def _explain(session: AsyncSession, sql: str) -> Tuple[float, int]:
+    result = await session.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    root = plan[0]["Plan"]
+    return float(root["Total Cost"]), int(root["Plan Rows"])
+
+# 실행 직전 가드 (RLS 컨텍스트가 설정된 같은 트랜잭션에서 호출)
+# 반환 : (실행할 SQL, 오류 메시지). 오류가 있으면 실행하지 않음
+async def guard_sql(session: AsyncSession, sql: str) -> Tuple[str, Optional[str]]:
+    sql = sql.strip().rstrip(";")
+
+    # EXPLAIN 실패가 트랜잭션을 깨뜨리지 않도록 세이브포인트 안에서 수행
+    try:
+        async with session.begin_nested():
+            cost, rows = await _explain(session, sql)
+    except Exception as e:
+        metrics.incr("sql_validation.explain_rejected")
+        return sql, f"SQL Validation Error: {str(e)}"
+
+    if not settings.SQL_GUARD_ENABLED:
+        return sql, None
+
+    metrics.observe("sql_guard.estimated_cost", cost)
+    if cost > settings.SQL_GUARD_MAX_COST:
+        metrics.incr("sql_guard.rejected_cost")
+        print(f"🛑 [SQL Guard] 예상 비용 초과로 거부 (cost={cost:.0f}, rows={rows})")
+        return sql, (
+            f"SQL Cost Guard Error: 예상 실행 비용({cost:.0f})이 허용치({settings.SQL_GUARD_MAX_COST:.0f})를 초과합니다. "
+            f"(예상 행 수: {rows}) 조인 조건 누락(카티전 곱)이 없는지 확인하고 WHERE 조건이나 집계로 범위를 좁히세요."
+        )
+
+    limited = apply_row_limit(sql, settings.SQL_GUARD_MAX_ROWS)
+    if limited:
+        metrics.incr("sql_guard.limit_injected")
+        if rows > settings.SQL_GUARD_MAX_ROWS:
+            print(f"✂️ [SQL Guard] 예상 {rows}행 -> LIMIT {settings.SQL_GUARD_MAX_ROWS} 적용")
+        return limited, None
+    return sql, None
@@ -0,0 +1,91 @@
+from typing import Optional
+import orjson
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.schema_context import count_text_tokens
+from app.services.result_summarizer import ResultDigest, should_summarize, sample_rows, summarize_in_database
+
+# 컬럼형 결과 페이로드 시작 문자열 (실제 데이터가 조회된 결과 판별용)
+RESULT_PREFIX = '{"columns":'
+
+# 조회 결과를 서버 사이드 커서로 스트리밍하며 프롬프트용 컬럼형 JSON으로 직렬화
+# - 형식 : {"columns": [...], "rows": [[...], ...], "row_count": 포함 행 수, "total_count": 전체 행 수, "truncated": bool}
+# - 바이트 / 토큰 예산을 넘으면 행 추가를 멈추고, 커서는 끝까지 읽어 전체 건수만 집계
+# - 비용 가드가 LIMIT을 주입했고 그 상한까지 찼다면 원본 SQL로 COUNT(*)를 한 번 더 실행해 정확한 건수 산출
+# - 전체 건수가 임계값을 넘으면 요약 모드 : 집계 요약(summary) + 앞쪽 샘플 행만 전달
+#   모든 행을 스트리밍했으면 스트리밍 중 누적한 요약, LIMIT으로 잘렸으면 원본 SQL 전체를 DB에서 집계
+#   (DB 집계 실패 시 complete=false 부분 요약)
+# 반환 : 직렬화된 문자열 (0건이면 None -> 호출부에서 권한 체크)
+async def stream_sql_result(session: AsyncSession, sql: str, original_sql: Optional[str] = None) -> Optional[str]:
+    result = await session.stream(text(sql))
+    columns = list(result.keys())
+    digest = ResultDigest(columns)
+
+    byte_budget = settings.SQL_RESULT_MAX_BYTES
+    token_budget = settings.SQL_RESULT_MAX_TOKENS
+    used_bytes = used_tokens = 0
+    rows = []
+    total = 0
+    truncated = False
+
+    async for partition in result.partitions(settings.SQL_RESULT_FETCH_SIZE):
+        digest.add_partition(partition)
+        for row in partition:
+            total += 1
+            if truncated:
+                continue
+            encoded = orjson.dumps(list(row), default=str)
+            row_tokens = count_text_tokens(encoded.decode("utf-8"))
+            if rows and (used_bytes + len(encoded) > byte_budget or used_tokens + row_tokens > token_budget):
+                truncated = True
+                continue
+            rows.append(orjson.Fragment(encoded))
+            used_bytes += len(encoded)
+            used_tokens += row_tokens
+
+    if total == 0:
+        return None
+
+    # LIMIT 상한까지 찼다면 잘린 결과이므로 원본 기준 전체 건수 집계 (실패 시 스트리밍 건수 유지)
+    total_is_exact = True
+    if original_sql and original_sql != sql and total >= settings.SQL_GUARD_MAX_ROWS:
+        try:
+            async with session.begin_nested():
+                count_result = await session.execute(text(f"SELECT COUNT(*) FROM (\n{original_sql}\n) AS _guarded_count"))
+                total = int(count_result.scalar())
+        except Exception as e:
+            total_is_exact = False
+            print(f"[SQL Result] 전체 건수 집계 실패: {e}")
+
+    summary = None
+    if should_summarize(total):
+        rows = sample_rows(rows)
+        if digest.row_count >= total and total_is_exact:
+            summary = digest.to_dict()
+        else:
+            summary = await summarize_in_database(session, original_sql, digest) if original_sql and total_is_exact else None
+            if summary is None:
+                summary = digest.to_dict(complete=False)
+                metrics.incr("sql_result.partial_summaries")
+        metrics.incr("sql_result.summarized")
+
+    truncated = truncated or len(rows) < total
+    metrics.observe("sql_result.bytes", used_bytes)
+    metrics.observe("sql_result.rows", len(rows))
+    if truncated:
+        metrics.incr("sql_result.truncated")
+
+    payload = {
+        "columns": columns,
+        "rows": rows,
+        "row_count": len(rows),
+        "total_count": total,
+        "truncated": truncated,
+    }
+    if summary:
+        payload["summary"] = summary
+    if not total_is_exact:
+        payload["total_count_is_lower_bound"] = True
+    return orjson.dumps(payload).decode("utf-8")
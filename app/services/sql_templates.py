@@ -0,0 +1,261 @@
+import re
+import json
+import time
+import asyncio
+import hashlib
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import redis.asyncio as redis
+from sqlalchemy import text
+from redis.commands.search.query import Query
+from redis.commands.search.field import NumericField, TagField, TextField, VectorField
+from redis.commands.search.indexDefinition import IndexDefinition, IndexType
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, redis_client
+from app.core.metrics import metrics
+from app.core.schema_cache import SchemaVersionedCache
+from app.core.embedding_context import EmbeddingContext
+from app.services.batching import embedding_batcher
+
+# 질문 슬롯 종류별 마스킹 표기 (템플릿 매칭용 임베딩은 마스킹된 질문으로 계산)
+SLOT_LABELS = {"department": "[부서]", "date": "[날짜]", "year": "[연도]", "number": "[숫자]"}
+
+# 사용자 컨텍스트 슬롯 : 질문에 드러나지 않고 요청자 정보로 채우는 값
+CONTEXT_SLOTS = ("employee_id", "company_email", "department_code", "parent_department", "job_rank_id")
+
+_DATE_PATTERN = re.compile(r"\d{4}-\d{1,2}-\d{1,2}")
+_YEAR_PATTERN = re.compile(r"(?:19|20)\d{2}(?=\s*년)")
+_NUMBER_PATTERN = re.compile(r"\d+")
+# SQL 리터럴 : 작은따옴표 문자열 또는 식별자에 붙지 않은 숫자
+_SQL_LITERAL = re.compile(r"'(?:[^']|'')*'|(?<![\w.])\d+(?:\.\d+)?(?![\w.])")
+_ISO_DATE = re.compile(r"^(\d{4})(-\d{2}-\d{2})$")
+
+
+# departments 테이블의 부서명 -> 부서코드 사전 (DEPARTMENT_DIRECTORY_REFRESH_SEC 주기로 갱신)
+class DepartmentDirectory:
+    def __init__(self, refresh_interval: float):
+        self.refresh_interval = refresh_interval
+        self._names: List[Tuple[str, str]] = []  # (부서명, 부서코드), 긴 이름 우선
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def refresh_if_stale(self):
+        if self._names and time.monotonic() - self._loaded_at < self.refresh_interval:
+            return
+        async with self._lock:
+            if self._names and time.monotonic() - self._loaded_at < self.refresh_interval:
+                return
+            try:
+                async with AsyncSessionLocal() as session:
+                    result = await session.execute(text("SELECT department_code, department_name FROM departments"))
+                    rows = result.fetchall()
+                self._names = sorted(((row.department_name, row.department_code) for row in rows), key=lambda x: -len(x[0]))
+            except Exception as e:
+                print(f"[Department Directory Error] {e}")
+            self._loaded_at = time.monotonic()
+
+    # 질문에 등장하는 부서명 위치 [(start, end, 부서코드)]
+    def find(self, question: str) -> List[Tuple[int, int, str]]:
+        found = []
+        for name, code in self._names:
+            for match in re.finditer(re.escape(name), question):
+                if not any(start < match.end() and match.start() < end for start, end, _ in found):
+                    found.append((match.start(), match.end(), code))
+        return found
+
+
+# 질문에서 타입이 있는 슬롯(부서/날짜/연도/숫자)을 찾아 마스킹
+# 반환 : (마스킹된 질문, [{"type", "value"}] 등장 순서)
+def extract_question_slots(question: str, departments: DepartmentDirectory) -> Tuple[str, List[Dict[str, str]]]:
+    spans = [(start, end, "department", code) for start, end, code in departments.find(question)]
+
+    def add(pattern: re.Pattern, slot_type: str):
+        for match in pattern.finditer(question):
+            if not any(start < match.end() and match.start() < end for start, end, _, _ in spans):
+                spans.append((match.start(), match.end(), slot_type, match.group()))
+
+    add(_DATE_PATTERN, "date")
+    add(_YEAR_PATTERN, "year")
+    add(_NUMBER_PATTERN, "number")
+    spans.sort()
+
+    masked, cursor = [], 0
+    for start, end, slot_type, _ in spans:
+        masked.append(question[cursor:start])
+        masked.append(SLOT_LABELS[slot_type])
+        cursor = end
+    masked.append(question[cursor:])
+    return "".join(masked), [{"type": slot_type, "value": value} for _, _, slot_type, value in spans]
+
+
+# 성공한 SQL의 리터럴을 질문 슬롯 / 사용자 컨텍스트 슬롯으로 치환한 템플릿 생성
+# 설명되지 않는 문자열 리터럴이 있거나, 쓰이지 않는 질문 슬롯이 있으면 템플릿으로 만들지 않음 (None)
+def build_sql_template(sql: str, slots: List[Dict[str, str]], context: Dict[str, str]) -> Optional[str]:
+    used = set()
+    ambiguous = False
+
+    def slot_for(value: str, types: Tuple[str, ...]) -> Optional[int]:
+        for i, slot in enumerate(slots):
+            if slot["type"] in types and slot["value"] == value:
+                return i
+        return None
+
+    def context_for(value: str) -> Optional[str]:
+        for name in CONTEXT_SLOTS:
+            if context.get(name) and str(context[name]) == value:
+                return name
+        return None
+
+    def replace(match: re.Match) -> str:
+        nonlocal ambiguous
+        literal = match.group()
+        if literal.startswith("'"):
+            value = literal[1:-1].replace("''", "'")
+            i = slot_for(value, ("department", "date", "year", "number"))
+            if i is not None:
+                used.add(i)
+                return f"'__SLOT_{i}__'"
+            # 질문의 연도로 만든 날짜 (예: 2025년 -> '2025-01-01')
+            iso = _ISO_DATE.match(value)
+            i = slot_for(iso.group(1), ("year",)) if iso else None
+            if i is not None:
+                used.add(i)
+                return f"'__SLOT_{i}__{iso.group(2)}'"
+            name = context_for(value)
+            if name is not None:
+                return f"'__CTX_{name}__'"
+            ambiguous = True
+            return literal
+
+        i = slot_for(literal, ("year", "number"))
+        if i is not None:
+            used.add(i)
+            return f"__SLOT_{i}__"
+        # 질문에 없는 숫자가 사용자 컨텍스트 값(직급 등)과 같으면 상수인지 컨텍스트인지 구분할 수 없음
+        if context_for(literal) is not None:
+            ambiguous = True
+        return literal
+
+    template = _SQL_LITERAL.sub(replace, sql)
+    if ambiguous or len(used) != len(slots):
+        return None
+    return template
+
+def _sql_string(value: str) -> str:
+    return str(value).replace("'", "''")
+
+# 템플릿 슬롯을 새 질문의 값과 요청자 컨텍스트로 채움
+def fill_sql_template(template: str, slots: List[Dict[str, str]], context: Dict[str, str]) -> str:
+    sql = template
+    for i, slot in enumerate(slots):
+        value = slot["value"]
+        if slot["type"] in ("year", "number") and not value.isdigit():
+            raise ValueError(f"invalid {slot['type']} slot: {value}")
+        sql = sql.replace(f"__SLOT_{i}__", _sql_string(value))
+    for name in CONTEXT_SLOTS:
+        sql = sql.replace(f"__CTX_{name}__", _sql_string(context.get(name, "")))
+    return sql
+
+
+# 자주 묻는 질문 유형의 파라미터화된 SQL 템플릿 저장소 (Redis 벡터 인덱스)
+# - 학습 : sql_agent_node에서 LLM이 생성해 성공한 SQL을 템플릿으로 변환해 저장 (같은 템플릿이면 support 증가)
+# - 조회 : 마스킹된 질문 임베딩 KNN + 슬롯 구성(signature) / 스키마 버전 / 최소 support 필터
+# - 적중 시 슬롯을 로컬에서 채워 gpt-4o 호출 없이 실행 (실행은 RlsSqlSession으로 RLS 적용)
+class SqlTemplateLibrary(SchemaVersionedCache):
+    def __init__(self, redis_client: redis.Redis, departments: DepartmentDirectory):
+        super().__init__(redis_client, "sqltpl:", "sql_template")
+        self.index_name = "idx:sql_template"
+        # KURE-v1 임베딩 모델 기준
+        self.vector_dim = 1024
+        self.distance_threshold = settings.SQL_TEMPLATE_DISTANCE_THRESHOLD
+        self.min_support = settings.SQL_TEMPLATE_MIN_SUPPORT
+        self.ttl = settings.SQL_TEMPLATE_TTL_SEC
+        self.departments = departments
+        self.embeddings = embedding_batcher
+
+    # 서버 시작 시(lifespan) 1회 호출 : 인덱스 확인 및 생성
+    async def initialize(self):
+        try:
+            await self.r.ft(self.index_name).info()
+            print(f"✅ [SQL Template] 인덱스 '{self.index_name}'가 이미 존재합니다.")
+        except Exception:
+            try:
+                schema = (
+                    TagField("schema"),
+                    TagField("signature"),
+                    NumericField("support"),
+                    TextField("masked_question"),
+                    VectorField("query_vector",
+                        "HNSW", {
+                            "TYPE": "FLOAT32",
+                            "DIM": self.vector_dim,
+                            "DISTANCE_METRIC": "COSINE"
+                        }
+                    )
+                )
+                definition = IndexDefinition(prefix=[self.prefix], index_type=IndexType.HASH)
+                await self.r.ft(self.index_name).create_index(schema, definition=definition)
+                print("🚀 [SQL Template] Redis Vector Index 생성 완료.")
+            except Exception as create_error:
+                print(f"❌ [SQL Template] 인덱스 생성 실패: {create_error}")
+
+    @staticmethod
+    def _signature(slots: List[Dict[str, str]]) -> str:
+        return "_".join(slot["type"] for slot in slots) or "none"
+
+    async def _prepare(self, question: str, embedding_ctx: Optional[EmbeddingContext]):
+        await self.departments.refresh_if_stale()
+        masked_question, slots = extract_question_slots(question, self.departments)
+        query_vector = await (embedding_ctx or self.embeddings).aembed_query(masked_question)
+        return masked_question, slots, query_vector
+
+    # 새 질문에 맞는 템플릿을 찾아 채운 SQL 반환 (없으면 None)
+    async def match(self, question: str, context: Dict[str, str], embedding_ctx: Optional[EmbeddingContext] = None) -> Optional[str]:
+        try:
+            masked_question, slots, query_vector = await self._prepare(question, embedding_ctx)
+            q = Query(
+                f"(@schema:{{{self.schema_tag()}}} @signature:{{{self._signature(slots)}}} @support:[{self.min_support} +inf])"
+                "=>[KNN 1 @query_vector $vec AS score]"
+            ).return_fields("sql_template", "masked_question", "score").dialect(2)
+            res = await self.r.ft(self.index_name).search(q, query_params={"vec": np.array(query_vector, dtype=np.float32).tobytes()})
+
+            if res.total > 0 and float(res.docs[0].score) < self.distance_threshold:
+                top_hit = res.docs[0]
+                metrics.incr("sql_template.hits")
+                print(f"[SQL Template Hit] '{masked_question}' ~ '{top_hit.masked_question}' (score={float(top_hit.score):.4f})")
+                return fill_sql_template(top_hit.sql_template, slots, context)
+            metrics.incr("sql_template.misses")
+            return None
+        except Exception as e:
+            print(f"[SQL Template Match Error] {e}")
+            return None
+
+    # LLM이 생성해 성공한 SQL을 템플릿으로 저장
+    async def learn(self, question: str, sql: str, context: Dict[str, str], embedding_ctx: Optional[EmbeddingContext] = None):
+        try:
+            masked_question, slots, query_vector = await self._prepare(question, embedding_ctx)
+            template = build_sql_template(sql, slots, context)
+            if template is None:
+                metrics.incr("sql_template.rejected")
+                return
+
+            schema = self.schema_tag()
+            signature = self._signature(slots)
+            key = f"{self.prefix}{schema}:{hashlib.sha1(f'{signature}|{template}'.encode('utf-8')).hexdigest()[:16]}"
+            async with self.r.pipeline() as pipe:
+                # 이미 있는 템플릿이면 support만 증가 (HSETNX로 최초 1회만 기록)
+                pipe.hsetnx(key, "schema", schema)
+                pipe.hsetnx(key, "signature", signature)
+                pipe.hsetnx(key, "sql_template", template)
+                pipe.hsetnx(key, "masked_question", masked_question)
+                pipe.hsetnx(key, "slots", json.dumps([slot["type"] for slot in slots]))
+                pipe.hsetnx(key, "query_vector", np.array(query_vector, dtype=np.float32).tobytes())
+                pipe.hincrby(key, "support", 1)
+                pipe.expire(key, self.ttl)
+                await pipe.execute()
+            metrics.incr("sql_template.learned")
+        except Exception as e:
+            print(f"[SQL Template Learn Error] {e}")
+
+department_directory = DepartmentDirectory(settings.DEPARTMENT_DIRECTORY_REFRESH_SEC)
+sql_template_library = SqlTemplateLibrary(redis_client, department_directory)
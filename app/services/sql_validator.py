@@ -0,0 +1,107 @@
+import time
+from typing import Optional
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import SqlglotError
+from sqlglot.optimizer.scope import Scope, traverse_scope
+from app.core.metrics import metrics
+from app.core.schema_catalog import schema_catalog, bare_table_name
+
+# 조회용 최상위 문장 (WITH 절은 Select / Union 등의 속성으로 파싱됨)
+_READ_ONLY_ROOTS = (exp.Select, exp.Union, exp.Intersect, exp.Except)
+# 어디에 있어도 허용하지 않는 노드 (DML / DDL / 파싱되지 않은 명령 / SELECT INTO)
+_FORBIDDEN_NODES = (exp.Insert, exp.Update, exp.Delete, exp.Merge, exp.Create, exp.Drop, exp.Command, exp.Into)
+
+# FROM 절의 테이블 함수 (generate_series(...) AS g(d) 등)
+def _is_table_function(table: exp.Table) -> bool:
+    return isinstance(table.this, exp.Func)
+
+def _columns_of(table: str) -> set:
+    return {column.lower() for column in schema_catalog.get_columns(table) or []}
+
+# 별칭을 현재 범위부터 바깥 범위 순으로 해석 (상관 서브쿼리는 가장 가까운 범위의 별칭이 우선)
+# 반환 : (원본, 원본을 가진 범위). 찾지 못하면 (None, None)
+def _resolve_source(scope: Scope, qualifier: str):
+    current = scope
+    while current is not None:
+        for alias, source in current.sources.items():
+            if alias.lower() == qualifier:
+                return source, current
+        current = current.parent
+    return None, None
+
+# 별칭 없는 컬럼 : 현재 범위부터 바깥 범위 순으로, 범위의 원본이 모두 실제 테이블일 때만 검사
+# (서브쿼리 / CTE / 테이블 함수가 섞인 범위는 출력 컬럼을 알 수 없으므로 통과)
+def _unqualified_column_exists(scope: Scope, name: str) -> bool:
+    current = scope
+    while current is not None:
+        sources = list(current.sources.values())
+        if any(not isinstance(source, exp.Table) or _is_table_function(source) for source in sources):
+            return True
+        if any(name in _columns_of(bare_table_name(source.name)) for source in sources):
+            return True
+        current = current.parent
+    return False
+
+def _check(sql: str) -> Optional[str]:
+    try:
+        statements = [stmt for stmt in sqlglot.parse(sql, read="postgres") if stmt is not None]
+    except SqlglotError as e:
+        return f"PostgreSQL 문법 오류: {e}"
+
+    if len(statements) != 1:
+        return f"SQL은 하나의 SELECT 문이어야 합니다. (현재 {len(statements)}개 문장)"
+    stmt = statements[0]
+    if not isinstance(stmt, _READ_ONLY_ROOTS) or stmt.find(*_FORBIDDEN_NODES):
+        return "조회(SELECT) 외의 SQL(INSERT/UPDATE/DELETE/DDL 등)은 실행할 수 없습니다."
+
+    known_tables = set(schema_catalog.tables())
+    # 카탈로그가 비어 있으면(인벤토리 미생성) 이름 검사는 DB에 맡김
+    if not known_tables:
+        return None
+
+    # SELECT 범위(scope)별로 FROM 절 원본(source)을 해석 (서브쿼리 / CTE / 상관 서브쿼리의 별칭 가림 반영)
+    try:
+        scopes = traverse_scope(stmt)
+    except (SqlglotError, RecursionError):
+        return None
+    output_aliases = {alias.alias.lower() for alias in stmt.find_all(exp.Alias)}
+
+    for scope in scopes:
+        # 1. 테이블 존재 여부 (CTE / 서브쿼리 / 테이블 함수는 제외)
+        for source in scope.sources.values():
+            if isinstance(source, exp.Table) and not _is_table_function(source) and bare_table_name(source.name) not in known_tables:
+                return f"존재하지 않는 테이블입니다: {source.sql(dialect='postgres')}"
+
+        # 2. 컬럼 존재 여부 (이 범위의 SELECT에 직접 속한 컬럼만 검사)
+        # - 상관관계 없는 하위 서브쿼리(스칼라 / IN / EXISTS)의 컬럼도 바깥 범위의 columns에 포함되므로,
+        #   바깥 범위의 FROM 절로 해석하면 정상 컬럼을 잘못 거부함 → 해당 서브쿼리 범위에서 검사
+        for column in scope.columns:
+            if column.find_ancestor(exp.Select) is not scope.expression:
+                continue
+            name = column.name.lower()
+            if name == "*" or not name:
+                continue
+            qualifier = column.table.lower()
+            if qualifier:
+                source, owner = _resolve_source(scope, qualifier)
+                if owner is None:
+                    return f"FROM 절에 없는 테이블 별칭입니다: {column.sql(dialect='postgres')}"
+                # 서브쿼리 / CTE / 테이블 함수의 출력 컬럼은 알 수 없으므로 DB에 맡김
+                if not isinstance(source, exp.Table) or _is_table_function(source):
+                    continue
+                table = bare_table_name(source.name)
+                if name not in _columns_of(table):
+                    return f"'{table}' 테이블에 없는 컬럼입니다: {column.sql(dialect='postgres')}"
+            elif name not in output_aliases and not _unqualified_column_exists(scope, name):
+                return f"참조한 테이블에 없는 컬럼입니다: {column.sql(dialect='postgres')}"
+    return None
+
+# LLM이 생성한 SQL을 실행 전에 로컬에서 검증 (PostgreSQL 파싱, 조회 전용, 테이블/컬럼 존재 여부)
+# 반환 : 오류 메시지 (통과 시 None)
+def validate_sql(sql: str) -> Optional[str]:
+    start = time.perf_counter()
+    error = _check(sql)
+    metrics.observe("sql_validation.seconds", time.perf_counter() - start)
+    metrics.incr("sql_validation.rejected" if error else "sql_validation.passed")
+    return error
@@ -1,43 +1,21 @@
 from sqlalchemy import text
-from app.core.database import AsyncSessionLocal
-from app.services.llm import get_embeddings
+from app.core.database import AsyncSessionLocal, SqlAgentSessionLocal
+from app.services.batching import embedding_batcher
+from app.core.embedding_context import EmbeddingContext
+from app.services.reranker import rerank
+from app.services.sql_guard import guard_sql
+from app.services.sql_result import stream_sql_result
+from app.core.config import settings
+from app.core.metrics import metrics
+from typing import Optional
+import asyncio
 import json
-from sentence_transformers import CrossEncoder
 import re
 import time
-import torch
-from optimum.onnxruntime import ORTModelForSequenceClassification
-from transformers import AutoTokenizer
-
-
-# 임베딩(자연어 => 벡터) 모델 : KURE-v1
-embeddings = get_embeddings()
-
-# Reranker(상위 10개 문서 추출) 모델
-ONNX_MODEL_DIR = "app/models/bge-reranker-onnx-int8"
-onnx_tokenizer = AutoTokenizer.from_pretrained(ONNX_MODEL_DIR)
-onnx_model = ORTModelForSequenceClassification.from_pretrained(
-    ONNX_MODEL_DIR, 
-    provider="CPUExecutionProvider"
-)
-
-# Text-to-SQL용 키워드(optimized_sql_keywords)를 바탕으로 RDB 스키마 벡터 검색 후 DDL 추출
-async def search_schema_and_get_ddl(query_text: str) -> str:
-    # 자연어 => 벡터 변환
-    query_vector = await embeddings.aembed_query(query_text)
-    
-    # 벡터 유사도 검색으로 상위 5개 DDL 추출
-    async with AsyncSessionLocal() as session:
-        stmt = text("""
-            SELECT ddl_content 
-            FROM tbl_deep_nexus_schema
-            ORDER BY schema_vector <=> :vector LIMIT 5
-        """)
-        result = await session.execute(stmt, {"vector": str(query_vector)})
-        rows = result.fetchall()
-        return "\n\n".join([row[0] for row in rows])
 
-    
+# 임베딩(KURE-v1), Reranker(bge-reranker ONNX INT8) 모델은 model_registry가 워커당 1개씩 보유
+# 임베딩은 embedding_batcher, Reranking은 reranker_service를 통해 동시 요청을 배치로 묶어 실행
+
 # SQL Injection 공격 차단을 위한 RLS 컨텍스트 값 검증
 def validate_security_context(value: str | int) -> str:
     str_val = str(value)
@@ -51,157 +29,358 @@ def validate_security_context(value: str | int) -> str:
 import json
 from sqlalchemy import text
 
-async def execute_sql_query(sql: str, employee_id: str, department_code: str, parent_department: str, job_rank_id: str) -> str:
-    try:
+# 요청 단위 RLS 실행 컨텍스트
+# - 첫 실행 시 커넥션 1개를 체크아웃하고 트랜잭션 시작 + RLS 세션 변수 / statement_timeout을 한 번만 주입
+# - 시도(플랜 캐시 / 템플릿 / LLM 재시도)마다 세이브포인트 안에서 실행 -> 실패해도 롤백 후 같은 커넥션 재사용
+# - 조회 전용이므로 종료 시 트랜잭션은 롤백
+# - 커넥션은 Text-to-SQL 전용 풀(SqlAgentSessionLocal)에서 가져오고, 재시도 LLM 호출 중 유휴 상태가
+#   SQL_IDLE_IN_TRANSACTION_TIMEOUT_MS를 넘으면 서버가 세션을 끊도록 idle_in_transaction_session_timeout 설정
+class RlsSqlSession:
+    def __init__(self, employee_id: str, department_code: str, parent_department: str, job_rank_id: str):
+        self.context = (employee_id, department_code, parent_department, job_rank_id)
+        self._session = None
+        self._transaction = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def _ensure_session(self):
+        if self._session is not None:
+            return
         # 1. 입력값 검증 (SQL Injection 방지)
-        safe_employee = validate_security_context(employee_id)
-        safe_dept = validate_security_context(department_code)
-        safe_parent = validate_security_context(parent_department)
-        safe_rank = validate_security_context(job_rank_id)
-        
-        #print(f"safe_employee : {safe_employee}, safe_dept : {safe_dept}, safe_parent : {safe_parent}, safe_rank : {safe_rank}")
-        
-    except ValueError as e:
-        return json.dumps({"status": "error", "message": str(e)}, ensure_ascii=False)
+        safe_employee, safe_dept, safe_parent, safe_rank = (validate_security_context(value) for value in self.context)
 
-    async with AsyncSessionLocal() as session:
+        session = SqlAgentSessionLocal()
         try:
             # 2. 하나의 트랜잭션으로 실행 (SET LOCAL의 유효 범위 보장)
-            async with session.begin():
-                
-                # 3. 다중 RLS 세션 변수 주입 (set_config 활용)
-                set_context_sql = text("""
-                    SELECT 
-                        set_config('app.current_employee_id', :emp, true),
-                        set_config('app.current_dept_code', :dept, true),
-                        set_config('app.current_parent_dept_code', :p_dept, true),
-                        set_config('app.current_rank_level', :rank, true);
-                """)
-                
-                await session.execute(set_context_sql, {
-                    "emp": safe_employee,
-                    "dept": safe_dept,
-                    "p_dept": safe_parent,
-                    "rank": safe_rank
-                })
-                
-                # 4. LLM이 생성한 메인 SQL 실행
-                result = await session.execute(text(sql))
-                columns = result.keys()
-                rows = result.fetchall()
-                
-                # 5. 결과가 0건일 경우 권한 체크
-                if not rows:
-                    # SELECT 쿼리인 경우에만 쉐도우 카운트 진행 (DML 사이드 이펙트 방지)
-                    if sql.strip().upper().startswith("SELECT"):
-                        # LLM이 생성한 SQL 마지막 세미콜론 제거
-                        clean_sql = sql.strip().rstrip(';')
-                        
-                        shadow_check = await session.execute(
-                            text("SELECT fn_check_query_count_bypass_rls(:query)"),
-                            {"query": clean_sql}
-                        )
-                        shadow_count = shadow_check.scalar()
-                        
-                        if shadow_count > 0:
-                            return json.dumps({
-                                "status": "forbidden",
-                                "message": "데이터가 존재하지만, 현재 사용자의 권한(직급/부서)으로는 접근할 수 없습니다."
-                            }, ensure_ascii=False)
-                        else:
-                            return json.dumps({
-                                "status": "not_found",
-                                "message": "요청하신 조건에 부합하는 데이터가 시스템에 존재하지 않습니다."
-                            }, ensure_ascii=False)
-                    
-                    return json.dumps([], ensure_ascii=False)
-
-                # 6. 정상 결과 반환
-                data = [dict(zip(columns, row)) for row in rows]
-                return json.dumps(data, ensure_ascii=False, default=str)
-                
+            self._transaction = await session.begin()
+
+            # 3. 다중 RLS 세션 변수 주입 (set_config 활용)
+            set_context_sql = text("""
+                SELECT 
+                    set_config('app.current_employee_id', :emp, true),
+                    set_config('app.current_dept_code', :dept, true),
+                    set_config('app.current_parent_dept_code', :p_dept, true),
+                    set_config('app.current_rank_level', :rank, true),
+                    set_config('statement_timeout', :timeout, true),
+                    set_config('idle_in_transaction_session_timeout', :idle_timeout, true);
+            """)
+            
+            await session.execute(set_context_sql, {
+                "emp": safe_employee,
+                "dept": safe_dept,
+                "p_dept": safe_parent,
+                "rank": safe_rank,
+                "timeout": str(settings.SQL_STATEMENT_TIMEOUT_MS),
+                "idle_timeout": str(settings.SQL_IDLE_IN_TRANSACTION_TIMEOUT_MS)
+            })
+        except Exception:
+            await session.close()
+            self._transaction = None
+            raise
+        self._session = session
+        metrics.incr("sql_rls.checkouts")
+
+    async def close(self):
+        if self._session is None:
+            return
+        try:
+            if self._transaction is not None and self._transaction.is_active:
+                await self._transaction.rollback()
+        finally:
+            await self._session.close()
+            self._session = None
+            self._transaction = None
+
+    async def execute(self, sql: str) -> str:
+        try:
+            await self._ensure_session()
+        except ValueError as e:
+            return json.dumps({"status": "error", "message": str(e)}, ensure_ascii=False)
         except Exception as e:
             return json.dumps({"status": "error", "message": f"SQL Execution Error: {str(e)}"}, ensure_ascii=False)
 
-# 비정형 데이터에 대한 하이브리드(키워드 + 벡터) 검색 수행 -> 상위 5개 문서 반환
-async def hybrid_vector_search(query_text: str, department_code: str, filter_keywords: list[str]) -> str:
-    #total_start = time.perf_counter()
-    
-    # 1. 임베딩 생성
-    #step1_start = time.perf_counter()
-    query_vector = await embeddings.aembed_query(query_text)
-    #print(f"⏱️ [Step 1: Embedding] {time.perf_counter() - step1_start:.4f} sec")
-    
-    async with AsyncSessionLocal() as session:
+        metrics.incr("sql_rls.attempts")
         try:
-            # 2. DB 설정 최적화
-            #step2_start = time.perf_counter()
-            await session.execute(text("SET LOCAL jit = off"))
+            async with self._session.begin_nested():
+                return await self._run(sql)
+        except Exception as e:
+            if "statement timeout" in str(e):
+                metrics.incr("sql_guard.timeouts")
+            return json.dumps({"status": "error", "message": f"SQL Execution Error: {str(e)}"}, ensure_ascii=False)
+
+    async def _run(self, sql: str) -> str:
+        session = self._session
+
+        # 4. 실행 없이 EXPLAIN으로 계획 단계 오류 / 예상 비용 확인, 필요 시 LIMIT 주입
+        original_sql = sql.strip().rstrip(';')
+        if settings.SQL_GUARD_ENABLED or settings.SQL_VALIDATION_EXPLAIN:
+            sql, guard_error = await guard_sql(session, sql)
+            if guard_error:
+                return json.dumps({"status": "error", "message": guard_error}, ensure_ascii=False)
+
+        # 5. LLM이 생성한 메인 SQL 실행 (서버 사이드 커서 스트리밍, 바이트/토큰 예산 내 컬럼형 직렬화)
+        payload = await stream_sql_result(session, sql, original_sql)
+        
+        # 6. 결과가 0건일 경우 권한 체크 (같은 커넥션에서 이어서 실행)
+        if payload is None:
+            # SELECT 쿼리인 경우에만 쉐도우 카운트 진행 (DML 사이드 이펙트 방지)
+            if original_sql.upper().startswith("SELECT"):
+                shadow_check = await session.execute(
+                    text("SELECT fn_check_query_count_bypass_rls(:query)"),
+                    {"query": original_sql}
+                )
+                shadow_count = shadow_check.scalar()
+                
+                if shadow_count > 0:
+                    return json.dumps({
+                        "status": "forbidden",
+                        "message": "데이터가 존재하지만, 현재 사용자의 권한(직급/부서)으로는 접근할 수 없습니다."
+                    }, ensure_ascii=False)
+                else:
+                    return json.dumps({
+                        "status": "not_found",
+                        "message": "요청하신 조건에 부합하는 데이터가 시스템에 존재하지 않습니다."
+                    }, ensure_ascii=False)
             
-            # 3. 벡터 검색 HNSW 인덱스 사용
-            vector_sql = text("""
-                SELECT content, metadata, doc_url, doc_title, (1 - (content_vector <=> :vector)) as sim_score
+            return json.dumps([], ensure_ascii=False)
+
+        # 7. 정상 결과 반환
+        return payload
+
+# 1단계 검색 leg는 청크 본문 대신 id, 점수, Rerank용 앞부분(rerank_text)만 조회
+# 본문/메타데이터는 최종 top-k에 대해서만 _hydrate_docs에서 한 번에 조회
+
+# 사용자가 열람 가능한 문서 범위 : 본인 부서, 상위 부서, 전사 공개
+def _permission_scopes(department_code: str, parent_department: str) -> list[str]:
+    return [scope for scope in (department_code, parent_department, settings.PUBLIC_PERMISSION_SCOPE) if scope]
+
+# 저장 모드별 1차 후보 검색 거리식
+# - halfvec : float16 섀도 컬럼(content_vector_half) HNSW 인덱스
+# - binary  : 부호 기반 이진 양자화 섀도 컬럼(content_vector_bin) HNSW 인덱스 (해밍 거리)
+COMPACT_DISTANCE_SQL = {
+    "halfvec": "content_vector_half <=> CAST(:vector AS halfvec(1024))",
+    "binary": "content_vector_bin <~> CAST(binary_quantize(CAST(:vector AS vector(1024))) AS bit(1024))",
+}
+
+# 벡터 검색 SQL (권한 범위 필터 적용)
+# - full    : content_vector(float32) HNSW 인덱스로 바로 상위 15개
+# - halfvec / binary : 압축 인덱스로 후보(VECTOR_RESCORE_CANDIDATES개)를 뽑은 뒤 원본 벡터로 재계산하여 상위 15개
+def build_vector_search_sql(mode: str):
+    if mode == "full":
+        return text("""
+            SELECT id, rerank_text, (1 - distance) as sim_score
+            FROM (
+                SELECT id, LEFT(content, :window) AS rerank_text, (content_vector <=> :vector) AS distance
                 FROM tbl_deep_nexus_docs
+                WHERE permission_departments && CAST(:scopes AS text[])
                 ORDER BY content_vector <=> :vector ASC
                 LIMIT 15
-            """)
-            
-            vector_result = await session.execute(vector_sql, {"vector": str(query_vector)})
-            vector_rows = vector_result.fetchall()
-            
-            # 4. 키워드 검색 GIN 인덱스 사용
-            keyword_rows = []
-            if filter_keywords:
-                safe_keywords = [f"'%{kw.replace("'", "''")}%'" for kw in filter_keywords]
-                array_literal = ", ".join(safe_keywords)
-                
-                keyword_sql = text(f"""
-                    SELECT content, metadata, doc_url, doc_title,0.0 as sim_score
-                    FROM tbl_deep_nexus_docs
-                    WHERE content ILIKE ANY(ARRAY[{array_literal}])
-                    LIMIT 15
-                """)
-                keyword_result = await session.execute(keyword_sql)
-                keyword_rows = keyword_result.fetchall()
-            
-            # 5. 결과 병합 및 중복 제거
-            unique_docs = {}
-            for row in vector_rows:
-                unique_docs[row.content] = row
-            for row in keyword_rows:
-                if row.content not in unique_docs:
-                    unique_docs[row.content] = row
-            combined_rows = list(unique_docs.values())
-            
-            if not combined_rows:
-                return "검색 결과가 없습니다."
+            ) candidates
+            ORDER BY distance ASC
+        """)
 
-            # 6. Reranking
-            documents = [row.content for row in combined_rows]
-            pairs = [[query_text, doc] for doc in documents]
-            
-            # ONNX 추론 로직 적용
-            inputs = onnx_tokenizer(
-                pairs, padding=True, truncation=True, return_tensors="pt", max_length=256
+    return text(f"""
+        SELECT id, LEFT(content, :window) AS rerank_text, (1 - (content_vector <=> :vector)) as sim_score
+        FROM (
+            SELECT id, content, content_vector
+            FROM tbl_deep_nexus_docs
+            WHERE permission_departments && CAST(:scopes AS text[])
+            ORDER BY {COMPACT_DISTANCE_SQL[mode]} ASC
+            LIMIT :candidates
+        ) shortlist
+        ORDER BY content_vector <=> :vector ASC
+        LIMIT 15
+    """)
+
+# 검색 프로필별 HNSW 탐색 깊이 (hnsw.ef_search)
+# - ef_search     : 트랜잭션 시작 시 설정값
+# - max_ef_search : 필터로 후보가 부족할 때 2배씩 넓혀 재검색하는 상한
+RETRIEVAL_PROFILES = {
+    "fast": {"ef_search": 40, "max_ef_search": 160},
+    "balanced": {"ef_search": 100, "max_ef_search": 400},
+    "exhaustive": {"ef_search": 400, "max_ef_search": 1000},
+}
+
+async def _set_ef_search(session, ef_search: int):
+    await session.execute(text("SELECT set_config('hnsw.ef_search', :ef, true)"), {"ef": str(ef_search)})
+
+# 벡터 검색 leg : HNSW 인덱스 사용 (권한 범위 필터 적용)
+# - hnsw.iterative_scan : 필터로 후보가 걸러져도 LIMIT을 채울 때까지 인덱스를 이어서 탐색 (pgvector 0.8+)
+# - relaxed_order 모드는 순서가 약간 섞일 수 있으므로 바깥 쿼리에서 거리순 재정렬
+# - iterative_scan이 꺼져 있을 때만, 결과가 VECTOR_MIN_CANDIDATES 미만이면 ef_search를 2배씩 넓혀 재검색 (프로필 상한까지)
+#   (켜져 있으면 인덱스가 이미 LIMIT을 채울 때까지 탐색하므로, 결과가 적다는 것은 권한 범위 내 문서 자체가 적다는 뜻)
+async def _vector_leg(session, query_vector: list[float], scopes: list[str], profile: str) -> list:
+    if settings.VECTOR_ITERATIVE_SCAN != "off":
+        await session.execute(
+            text("SELECT set_config('hnsw.iterative_scan', :mode, true)"),
+            {"mode": settings.VECTOR_ITERATIVE_SCAN}
+        )
+
+    profile_config = RETRIEVAL_PROFILES.get(profile, RETRIEVAL_PROFILES[settings.RETRIEVAL_PROFILE])
+    ef_search = profile_config["ef_search"]
+    # 압축 모드는 1차 후보 수만큼은 인덱스에서 꺼낼 수 있어야 함
+    if settings.VECTOR_STORAGE_MODE != "full":
+        ef_search = max(ef_search, settings.VECTOR_RESCORE_CANDIDATES)
+
+    stmt = build_vector_search_sql(settings.VECTOR_STORAGE_MODE)
+    params = {
+        "vector": str(query_vector),
+        "window": settings.RERANK_WINDOW_CHARS,
+        "scopes": scopes,
+        "candidates": settings.VECTOR_RESCORE_CANDIDATES
+    }
+    while True:
+        await _set_ef_search(session, ef_search)
+        rows = (await session.execute(stmt, params)).fetchall()
+        if (settings.VECTOR_ITERATIVE_SCAN != "off"
+                or len(rows) >= settings.VECTOR_MIN_CANDIDATES
+                or ef_search >= profile_config["max_ef_search"]):
+            return rows
+        ef_search = min(ef_search * 2, profile_config["max_ef_search"])
+        metrics.incr("retrieval.ef_search_widened")
+        print(f"🔁 [Hybrid Search] 후보 {len(rows)}건 부족 - ef_search {ef_search}로 재검색")
+
+# LIKE 패턴 특수문자(\, %, _) 이스케이프
+def _escape_like(keyword: str) -> str:
+    return keyword.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+# 키워드 검색 leg : pg_trgm GIN 인덱스 사용 (순위 있는 어휘 검색)
+# - 키워드별 ILIKE 조건을 OR로 나열하여 GIN 인덱스 BitmapOr 스캔을 유도 (값은 모두 바인딩 파라미터)
+# - 키워드별 word_similarity 합으로 순위를 매겨 상위 15개 반환
+async def _keyword_leg(session, filter_keywords: list[str], scopes: list[str]) -> list:
+    keywords = [kw.strip() for kw in filter_keywords if kw and kw.strip()][:settings.KEYWORD_LEG_MAX_KEYWORDS]
+    if not keywords:
+        return []
+
+    conditions = " OR ".join(f"content ILIKE :pattern_{i}" for i in range(len(keywords)))
+    params = {f"pattern_{i}": f"%{_escape_like(kw)}%" for i, kw in enumerate(keywords)}
+    params["keywords"] = keywords
+    params["window"] = settings.RERANK_WINDOW_CHARS
+    params["scopes"] = scopes
+
+    keyword_sql = text(f"""
+        SELECT id, LEFT(content, :window) AS rerank_text,
+               (SELECT SUM(word_similarity(kw, content)) FROM unnest(CAST(:keywords AS text[])) AS kw) AS lex_score
+        FROM tbl_deep_nexus_docs
+        WHERE permission_departments && CAST(:scopes AS text[])
+          AND ({conditions})
+        ORDER BY lex_score DESC
+        LIMIT 15
+    """)
+    result = await session.execute(keyword_sql, params)
+    return result.fetchall()
+
+# Reciprocal Rank Fusion : 각 leg의 순위(rank)만으로 점수를 합산하여 병합
+# score(doc) = Σ 1 / (k + rank)  (rank는 1부터). 점수 스케일이 다른 leg도 공정하게 결합
+def reciprocal_rank_fusion(ranked_lists: list[list], key, k: int) -> list:
+    fused_scores = {}
+    rows = {}
+    for ranked in ranked_lists:
+        for rank, row in enumerate(ranked, start=1):
+            row_key = key(row)
+            fused_scores[row_key] = fused_scores.get(row_key, 0.0) + 1.0 / (k + rank)
+            rows.setdefault(row_key, row)
+    return [rows[row_key] for row_key in sorted(fused_scores, key=fused_scores.get, reverse=True)]
+
+# 2단계 : 최종 top-k 청크의 본문과 메타데이터를 id 기준 한 번의 쿼리로 조회
+async def _hydrate_docs(doc_ids: list[int], scopes: list[str]) -> dict:
+    async with AsyncSessionLocal() as session:
+        hydrate_sql = text("""
+            SELECT id, content, metadata, doc_url, doc_title
+            FROM tbl_deep_nexus_docs
+            WHERE id = ANY(:ids)
+              AND permission_departments && CAST(:scopes AS text[])
+        """)
+        result = await session.execute(hydrate_sql, {"ids": doc_ids, "scopes": scopes})
+        return {row.id: row for row in result.fetchall()}
+
+# 검색 leg 1개를 별도 풀 커넥션에서 실행
+# 타임아웃/에러 시 빈 결과를 반환하여 나머지 leg 결과만으로 병합이 진행되도록 함
+async def _run_retrieval_leg(name: str, leg, *args, timeout: float, timings: dict) -> list:
+    start = time.perf_counter()
+    rows = []
+    try:
+        async with AsyncSessionLocal() as session:
+            async def run():
+                # DB 설정 최적화
+                await session.execute(text("SET LOCAL jit = off"))
+                return await leg(session, *args)
+            rows = await asyncio.wait_for(run(), timeout=timeout)
+    except asyncio.TimeoutError:
+        metrics.incr(f"retrieval.{name}_leg_timeouts")
+        print(f"⏱️ [Hybrid Search] {name} leg 타임아웃({timeout}s) - 나머지 결과로 진행")
+    except Exception as e:
+        metrics.incr(f"retrieval.{name}_leg_errors")
+        print(f"❌ [Hybrid Search] {name} leg 실패 - 나머지 결과로 진행: {e}")
+
+    elapsed = time.perf_counter() - start
+    timings[name] = elapsed
+    metrics.observe(f"retrieval.{name}_leg_seconds", elapsed)
+    return rows
+
+# Router 결정 전에 원본 질문으로 벡터 leg만 미리 실행 (vector / both 의도일 때 hybrid_vector_search에서 사용)
+async def prefetch_vector_leg(question: str, department_code: str, parent_department: str, embedding_ctx: Optional[EmbeddingContext] = None, profile: Optional[str] = None) -> list:
+    query_vector = await (embedding_ctx or embedding_batcher).aembed_query(question)
+    scopes = _permission_scopes(department_code, parent_department)
+    timings = {}
+    rows = await _run_retrieval_leg("vector_prefetch", _vector_leg, query_vector, scopes, profile or settings.RETRIEVAL_PROFILE, timeout=settings.VECTOR_LEG_TIMEOUT_SEC, timings=timings)
+    print(f"⏱️ [Prefetch] vector leg 소요 시간: {timings['vector_prefetch']:.3f}s ({len(rows)}건)")
+    return rows
+
+# 비정형 데이터에 대한 하이브리드(키워드 + 벡터) 검색 수행 -> 상위 3개 문서 반환
+# 사용자의 부서/상위 부서/전사 공개 범위에 속한 문서만 검색
+# vector_rows : Router 결정 전에 같은 검색어로 미리 실행한 벡터 leg 결과 (있으면 임베딩/벡터 leg 생략)
+# extra_rows : 다른 검색어(원본 질문)로 미리 실행한 벡터 leg 결과 (RRF에 추가 순위 목록으로 병합)
+async def hybrid_vector_search(query_text: str, department_code: str, parent_department: str, filter_keywords: list[str], embedding_ctx: Optional[EmbeddingContext] = None, profile: Optional[str] = None, vector_rows: Optional[list] = None, extra_rows: Optional[list] = None) -> str:
+    scopes = _permission_scopes(department_code, parent_department)
+    
+    try:
+        # 1~2. 임베딩 생성 후 벡터 / 키워드 검색 leg를 각각의 커넥션에서 동시 실행
+        timings = {}
+        if vector_rows:
+            keyword_rows = await _run_retrieval_leg("keyword", _keyword_leg, filter_keywords, scopes, timeout=settings.KEYWORD_LEG_TIMEOUT_SEC, timings=timings)
+        else:
+            query_vector = await (embedding_ctx or embedding_batcher).aembed_query(query_text)
+            vector_rows, keyword_rows = await asyncio.gather(
+                _run_retrieval_leg("vector", _vector_leg, query_vector, scopes, profile or settings.RETRIEVAL_PROFILE, timeout=settings.VECTOR_LEG_TIMEOUT_SEC, timings=timings),
+                _run_retrieval_leg("keyword", _keyword_leg, filter_keywords, scopes, timeout=settings.KEYWORD_LEG_TIMEOUT_SEC, timings=timings),
             )
-            with torch.no_grad():
-                outputs = onnx_model(**inputs)
-                scores = outputs.logits.view(-1,).float().tolist()
-            
-            # 점수 높은 순 정렬
-            scored_docs = sorted(zip(scores, combined_rows), key=lambda x: x[0], reverse=True)
-            
-            # 상위 3개 선택
-            top_k = scored_docs[:3]
-            formatted_docs = []
-            for score, row in top_k:
-                formatted_docs.append(
-                    f"- 내용 : {row.content}\n- 파일명 : {row.doc_title}\n- 출처 : {row.doc_url}\n"
-                )
-            #print(f"⏱️ [Step 6: Reranking (ONNX)] {time.perf_counter() - step6_start:.4f} sec")
-            
-            #print(f"🚀 [Total Latency] {time.perf_counter() - total_start:.4f} sec")
-            return "\n\n".join(formatted_docs)
-            
-        except Exception as e:
-            return f"Error: {str(e)}"            
\ No newline at end of file
+        print("⏱️ [Hybrid Search] leg 소요 시간: " + ", ".join(f"{name}={sec:.3f}s" for name, sec in timings.items()))
+        
+        # 3. 결과 병합 및 id 기준 중복 제거 (RRF) 후 상위 후보만 Reranker로 전달
+        ranked_lists = [vector_rows, keyword_rows] + ([extra_rows] if extra_rows else [])
+        combined_rows = reciprocal_rank_fusion(
+            ranked_lists, key=lambda row: row.id, k=settings.RRF_K
+        )[:settings.RERANK_CANDIDATES]
+        
+        if not combined_rows:
+            return "검색 결과가 없습니다."
+
+        # 4. Reranking (청크 앞부분 rerank_text 기준)
+        documents = [row.rerank_text for row in combined_rows]
+        
+        # 점수 캐시에 없는 쌍만 ONNX 추론 (전용 스레드에서 다른 요청의 쌍과 함께 배치 처리)
+        scores = await rerank(query_text, documents)
+        
+        # 점수 높은 순 정렬 후 상위 k개 선택
+        scored_docs = sorted(zip(scores, combined_rows), key=lambda x: x[0], reverse=True)
+        top_ids = [row.id for _, row in scored_docs[:settings.RETRIEVAL_TOP_K]]
+        
+        # 5. 최종 top-k 청크만 본문/메타데이터 조회
+        hydrated = await _hydrate_docs(top_ids, scopes)
+        formatted_docs = []
+        for doc_id in top_ids:
+            row = hydrated.get(doc_id)
+            if row is None:
+                continue
+            formatted_docs.append(
+                f"- 내용 : {row.content}\n- 파일명 : {row.doc_title}\n- 출처 : {row.doc_url}\n"
+            )
+        return "\n\n".join(formatted_docs)
+        
+    except Exception as e:
+        return f"Error: {str(e)}"
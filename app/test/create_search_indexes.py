@@ -0,0 +1,79 @@
+"""
+하이브리드 검색용 PostgreSQL 확장 및 인덱스 생성 스크립트. (여러 번 실행해도 안전)
+
+- pg_trgm GIN 인덱스 : 키워드 leg의 ILIKE 필터 및 word_similarity 순위 계산용
+- permission_departments 컬럼 + GIN 인덱스 : 부서/권한 범위 필터 (permission_list의 departments를 배열로 비정규화)
+- content_vector_half / content_vector_bin 섀도 컬럼 + HNSW 인덱스 : VECTOR_STORAGE_MODE=halfvec / binary 용
+
+CREATE INDEX CONCURRENTLY 는 트랜잭션 밖에서 실행되어야 하므로 AUTOCOMMIT 커넥션을 사용합니다.
+"""
+import sys
+import os
+import asyncio
+from sqlalchemy import text
+
+# 프로젝트 루트 디렉토리를 시스템 경로에 추가
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from app.core.database import engine
+
+SEARCH_INDEX_DDL = [
+    # 키워드 leg : 트라이그램 기반 ILIKE / word_similarity
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_deep_nexus_docs_content_trgm
+    ON tbl_deep_nexus_docs USING gin (content gin_trgm_ops)
+    """,
+    # 권한 범위 필터 : departments가 없는 기존 문서는 전사 공개(ALL)로 간주
+    """
+    ALTER TABLE tbl_deep_nexus_docs
+    ADD COLUMN IF NOT EXISTS permission_departments text[] NOT NULL DEFAULT ARRAY['ALL']
+    """,
+    """
+    UPDATE tbl_deep_nexus_docs
+    SET permission_departments = ARRAY(SELECT jsonb_array_elements_text(permission_list->'departments'))
+    WHERE jsonb_typeof(permission_list->'departments') = 'array'
+      AND jsonb_array_length(permission_list->'departments') > 0
+    """,
+    """
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_deep_nexus_docs_permission_departments
+    ON tbl_deep_nexus_docs USING gin (permission_departments)
+    """,
+    # 압축 저장 모드 : halfvec(float16, 2KB/청크), binary(부호 비트, 128B/청크) 섀도 컬럼
+    """
+    ALTER TABLE tbl_deep_nexus_docs
+    ADD COLUMN IF NOT EXISTS content_vector_half halfvec(1024),
+    ADD COLUMN IF NOT EXISTS content_vector_bin bit(1024)
+    """,
+    """
+    UPDATE tbl_deep_nexus_docs
+    SET content_vector_half = CAST(content_vector AS halfvec(1024)),
+        content_vector_bin = CAST(binary_quantize(content_vector) AS bit(1024))
+    WHERE content_vector IS NOT NULL
+      AND (content_vector_half IS NULL OR content_vector_bin IS NULL)
+    """,
+    """
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_deep_nexus_docs_vector_half_hnsw
+    ON tbl_deep_nexus_docs USING hnsw (content_vector_half halfvec_cosine_ops)
+    """,
+    """
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_deep_nexus_docs_vector_bin_hnsw
+    ON tbl_deep_nexus_docs USING hnsw (content_vector_bin bit_hamming_ops)
+    """,
+]
+
+async def create_search_indexes():
+    print("🚀 검색 인덱스 생성을 시작합니다...")
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for ddl in SEARCH_INDEX_DDL:
+            statement = " ".join(ddl.split())
+            print(f" >> {statement[:100]}")
+            await conn.execute(text(ddl))
+        await conn.execute(text("ANALYZE tbl_deep_nexus_docs"))
+    print("🎉 검색 인덱스 생성 완료!")
+
+if __name__ == "__main__":
+    asyncio.run(create_search_indexes())
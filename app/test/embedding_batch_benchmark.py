@@ -0,0 +1,77 @@
+"""
+임베딩 호출 방식별 처리량 벤치마크.
+
+- per-call : 기존 방식. 코루틴마다 HuggingFaceEmbeddings.aembed_query 로 배치 크기 1의 forward 수행
+- batched  : EmbeddingBatcher 가 동시 요청을 모아 한 번의 패딩 배치로 forward 수행
+
+동시 사용자 수(--concurrency)만큼의 코루틴이 각자 --requests 건의 질문을 임베딩하며
+전체 처리량(queries/sec)과 호출당 지연 시간 p50 / p95 를 출력합니다.
+
+실행 : python app/test/embedding_batch_benchmark.py --concurrency 50 --requests 10
+"""
+import sys
+import os
+import time
+import asyncio
+import argparse
+import numpy as np
+
+# 프로젝트 루트 디렉토리를 시스템 경로에 추가
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from app.core.model_registry import model_registry
+from app.services.batching import EmbeddingBatcher
+
+SAMPLE_QUERIES = [
+    "내 연차 얼마 남았어?",
+    "인사팀 대리급 직원들의 올해 예상 연봉 총합 보여줘.",
+    "우리 회사 재택근무 규정이 어떻게 돼?",
+    "경조사비 지급 규정이랑 내 신청 이력 보여줘.",
+    "회사 보안 지침 중에서 외부 장비 반입 절차 설명해줘.",
+    "파이썬 숙련도가 '상'인 개발자들 명단 알려줘.",
+    "미래금융지주 프로젝트에 참여 중인 인원 알려줘.",
+    "개발팀 올해 연차 사용 현황 보여줘.",
+]
+
+async def run(embedder, concurrency: int, requests: int) -> tuple[float, list[float]]:
+    latencies = []
+
+    async def user(user_idx: int):
+        for i in range(requests):
+            text = f"{SAMPLE_QUERIES[(user_idx + i) % len(SAMPLE_QUERIES)]} ({user_idx}-{i})"
+            start = time.perf_counter()
+            await embedder.aembed_query(text)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[user(u) for u in range(concurrency)])
+    return time.perf_counter() - start, latencies
+
+def report(label: str, elapsed: float, latencies: list[float]):
+    arr = np.array(latencies) * 1000
+    print(f"[{label}] {len(arr)} queries in {elapsed:.2f}s -> {len(arr) / elapsed:.1f} q/s, "
+          f"p50={np.percentile(arr, 50):.1f}ms p95={np.percentile(arr, 95):.1f}ms")
+
+async def main(concurrency: int, requests: int, max_batch_size: int, max_wait_ms: float):
+    embeddings = model_registry.get_embeddings()
+    # 모델 warm-up
+    await embeddings.aembed_query("warm up")
+
+    elapsed, latencies = await run(embeddings, concurrency, requests)
+    report("per-call", elapsed, latencies)
+
+    batcher = EmbeddingBatcher(max_batch_size, max_wait_ms)
+    elapsed, latencies = await run(batcher, concurrency, requests)
+    report(f"batched(max_batch={max_batch_size}, max_wait={max_wait_ms}ms)", elapsed, latencies)
+    await batcher.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency, args.requests, args.max_batch_size, args.max_wait_ms))
@@ -9,7 +9,8 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(os.path.dirname(current_dir))
 sys.path.append(project_root)
 
-from app.core.database import AsyncSessionLocal
+from app.core.database import AsyncSessionLocal, redis_client
+from app.core.schema_index import SCHEMA_VERSION_KEY
 from app.services.llm import get_embeddings
 
 async def insert_schema_data():
@@ -1128,5 +1129,10 @@ async def insert_schema_data():
         await session.commit()
         print("🎉 모든 스키마 데이터가 성공적으로 적재되었습니다!")
 
+    # 4. 버전 스탬프 갱신 : 실행 중인 서버의 스키마 벡터 인덱스가 다음 확인 주기에 재적재
+    version = await redis_client.incr(SCHEMA_VERSION_KEY)
+    await redis_client.aclose()
+    print(f"🔄 스키마 버전 갱신: {version}")
+
 if __name__ == "__main__":
     asyncio.run(insert_schema_data())
\ No newline at end of file
@@ -20,7 +20,8 @@ from googleapiclient.http import MediaIoBaseDownload
 from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, func, select, delete
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
-from pgvector.sqlalchemy import Vector
+from sqlalchemy.dialects.postgresql import ARRAY
+from pgvector.sqlalchemy import Vector, HALFVEC, BIT
 
 # [추가] LangChain 관련 라이브러리 임포트
 from langchain_huggingface import HuggingFaceEmbeddings
@@ -37,6 +38,8 @@ EMBEDDING_MODEL_NAME = 'nlpai-lab/KURE-v1'
 SCOPES = ['https://www.googleapis.com/auth/drive.readonly']
 CREDENTIALS_FILE = os.path.join(BASE_DIR, 'deepnexus_client.json')
 VECTOR_DIMENSION = 1024 
+# 열람 가능 부서를 지정하지 않은 파일은 전사 공개
+PUBLIC_PERMISSION_SCOPE = "ALL"
 
 # NLTK 데이터 다운로드
 nltk.download('punkt', quiet=True)
@@ -54,8 +57,12 @@ class DeepNexusDoc(Base):
     doc_url = Column(Text)
     content = Column(Text, nullable=False)
     content_vector = Column(Vector(VECTOR_DIMENSION))
+    # 압축 저장 모드용 섀도 컬럼 (halfvec : float16, bin : 부호 기반 이진 양자화)
+    content_vector_half = Column(HALFVEC(VECTOR_DIMENSION))
+    content_vector_bin = Column(BIT(VECTOR_DIMENSION))
     metadata_info = Column("metadata", JSON)
     permission_list = Column(JSON)
+    permission_departments = Column(ARRAY(String))
     version = Column(String(100))
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
@@ -76,6 +83,13 @@ def get_drive_service():
             token.write(creds.to_json())
     return build('drive', 'v3', credentials=creds)
 
+# 파일의 열람 가능 부서 목록
+# Google Drive 파일 속성(appProperties)의 departments 값(콤마 구분 부서코드)을 사용. 없으면 전사 공개
+def resolve_permission_departments(item: dict) -> list[str]:
+    raw = item.get('appProperties', {}).get('departments', '')
+    departments = [code.strip() for code in raw.split(',') if code.strip()]
+    return departments or [PUBLIC_PERMISSION_SCOPE]
+
 # 메인 함수
 async def process_and_ingest():
     # 1. 초기화
@@ -103,7 +117,7 @@ async def process_and_ingest():
     # 2. 파일 리스트 조회
     print(" >> Google Drive 스캔 중...")
     query = "mimeType != 'application/vnd.google-apps.folder' and trashed = false"
-    fields = "files(id, name, mimeType, webViewLink, modifiedTime, version)"
+    fields = "files(id, name, mimeType, webViewLink, modifiedTime, version, appProperties)"
     
     results = service.files().list(q=query, fields=fields).execute()
     items = results.get('files', [])
@@ -248,6 +262,7 @@ async def process_and_ingest():
                 vectors = model.encode(chunks)
                 
                 # D. DB 객체 생성
+                permission_departments = resolve_permission_departments(item)
                 db_objs = []
                 for idx, (chunk_text, vec) in enumerate(zip(chunks, vectors)):
                     final_vec = vec.tolist()
@@ -261,12 +276,15 @@ async def process_and_ingest():
                         doc_url=item.get('webViewLink'),
                         content=chunk_text,
                         content_vector=final_vec,
+                        content_vector_half=final_vec,
+                        content_vector_bin="".join("1" if v > 0 else "0" for v in final_vec),
                         version=drive_version,
                         metadata_info={
                             "modified_time": drive_modified,
                             "source": "drive_sync"
                         },
-                        permission_list={"role": "admin"}
+                        permission_list={"role": "admin", "departments": permission_departments},
+                        permission_departments=permission_departments
                     ))
 
                 session.add_all(db_objs)
@@ -0,0 +1,72 @@
+"""
+로컬 의도 분류기 vs LLM Router 지연 시간 및 일치율 벤치마크.
+
+- Router 결정 로그를 질문 해시로 학습 80% / 평가 20% 로 나눔
+- 학습 분할로 임시 kNN 모델을 만들고, 평가 질문마다 (임베딩 + 분류) 지연 시간 측정
+- 확신도 기준별 커버리지(로컬 처리 비율)와 LLM 결정과의 일치율 출력
+- LLM Router 지연 시간은 로그의 llm_latency_ms 사용
+
+실행 : python app/test/local_router_benchmark.py
+"""
+import sys
+import os
+import time
+import hashlib
+import argparse
+import tempfile
+import numpy as np
+
+# 프로젝트 루트 디렉토리를 시스템 경로에 추가
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from app.core.config import settings
+from app.core.model_registry import model_registry
+from app.services.local_router import LocalIntentRouter
+from app.test.train_local_router import load_decisions, build_model
+
+THRESHOLDS = [0.6, 0.7, 0.8, 0.9, 1.0]
+
+def is_holdout(decision: dict) -> bool:
+    return int(hashlib.sha1(decision["normalized_question"].encode("utf-8")).hexdigest(), 16) % 5 == 0
+
+def main(log_path: str):
+    decisions = load_decisions(log_path)
+    train = [d for d in decisions if not is_holdout(d)]
+    test = [d for d in decisions if is_holdout(d)]
+    print(f"🔍 train={len(train)}, test={len(test)}")
+    if not train or not test:
+        print("⚠️ 평가할 데이터가 부족합니다.")
+        return
+
+    embeddings = model_registry.get_embeddings()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_path = os.path.join(tmp_dir, "router_knn.npz")
+        build_model(train, model_path)
+        # 확신도 기준은 아래에서 직접 비교하므로 분류기 자체 기준은 0으로 둠
+        router = LocalIntentRouter(model_path, os.devnull, settings.LOCAL_ROUTER_K, 0.0, settings.LOCAL_ROUTER_MIN_SIMILARITY, settings.LOCAL_ROUTER_REUSE_SIMILARITY)
+        router.classify(embeddings.embed_query(test[0]["question"])) # 모델 적재 / 워밍업
+
+        predictions, latencies = [], []
+        for d in test:
+            start = time.perf_counter()
+            predictions.append(router.classify(embeddings.embed_query(d["question"])))
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    llm_latencies = [d["llm_latency_ms"] for d in test if d.get("llm_latency_ms")]
+    print(f"[local] p50={np.percentile(latencies, 50):.1f}ms p95={np.percentile(latencies, 95):.1f}ms")
+    if llm_latencies:
+        print(f"[  llm] p50={np.percentile(llm_latencies, 50):.1f}ms p95={np.percentile(llm_latencies, 95):.1f}ms")
+
+    for threshold in THRESHOLDS:
+        covered = [(d, p) for d, p in zip(test, predictions) if p and p["confidence"] >= threshold]
+        agreed = sum(1 for d, p in covered if p["intent"] == d["intent"])
+        agreement = agreed / len(covered) if covered else 0.0
+        print(f"[confidence>={threshold:.1f}] coverage={len(covered) / len(test):.3f} agreement={agreement:.3f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--log", default=settings.ROUTER_LOG_PATH)
+    args = parser.parse_args()
+    main(args.log)
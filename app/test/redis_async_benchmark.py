@@ -0,0 +1,100 @@
+"""
+동기 Redis 클라이언트(before) vs redis.asyncio 커넥션 풀(after) 비교 벤치마크.
+
+/chat 한 건이 Redis에 가하는 부하(대화 기록 조회 -> 시맨틱 캐시 KNN 검색 -> 토큰 스트리밍 -> 대화 기록 저장)를
+동시 스트림 N개(기본 200)로 재현하여, 스트림별 전체 지연 시간의 p50 / p95 / p99 를 출력합니다.
+LLM 호출은 토큰 간 sleep 으로 대체하므로 Redis 호출이 이벤트 루프를 막는 영향만 측정됩니다.
+
+실행 : python app/test/redis_async_benchmark.py --streams 200 --tokens 30
+"""
+import sys
+import os
+import time
+import asyncio
+import argparse
+import numpy as np
+import redis
+import redis.asyncio as aioredis
+from redis.commands.search.query import Query
+
+# 프로젝트 루트 디렉토리를 시스템 경로에 추가
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from app.core.config import settings
+
+INDEX_NAME = "idx:semantic_cache_scoped"
+VECTOR_DIM = 1024
+
+def knn_query():
+    return Query("*=>[KNN 1 @query_vector $vec AS score]").return_fields("response_text", "score").dialect(2)
+
+def random_vector_bytes() -> bytes:
+    vec = np.random.rand(VECTOR_DIM).astype(np.float32)
+    return (vec / np.linalg.norm(vec)).tobytes()
+
+# [before] async def 안에서 동기 클라이언트를 그대로 호출 (기존 구현과 동일)
+async def stream_with_sync_client(r: redis.Redis, session_id: str, tokens: int, token_delay: float) -> float:
+    start = time.perf_counter()
+    r.lrange(f"bench:history:{session_id}", 0, 29)
+    r.ft(INDEX_NAME).search(knn_query(), query_params={"vec": random_vector_bytes()})
+    for _ in range(tokens):
+        await asyncio.sleep(token_delay)
+    pipe = r.pipeline()
+    pipe.lpush(f"bench:history:{session_id}", "benchmark")
+    pipe.ltrim(f"bench:history:{session_id}", 0, 29)
+    pipe.expire(f"bench:history:{session_id}", 60)
+    pipe.execute()
+    return time.perf_counter() - start
+
+# [after] redis.asyncio 커넥션 풀 기반 클라이언트
+async def stream_with_async_client(r: aioredis.Redis, session_id: str, tokens: int, token_delay: float) -> float:
+    start = time.perf_counter()
+    await r.lrange(f"bench:history:{session_id}", 0, 29)
+    await r.ft(INDEX_NAME).search(knn_query(), query_params={"vec": random_vector_bytes()})
+    for _ in range(tokens):
+        await asyncio.sleep(token_delay)
+    async with r.pipeline() as pipe:
+        pipe.lpush(f"bench:history:{session_id}", "benchmark")
+        pipe.ltrim(f"bench:history:{session_id}", 0, 29)
+        pipe.expire(f"bench:history:{session_id}", 60)
+        await pipe.execute()
+    return time.perf_counter() - start
+
+def report(label: str, latencies: list[float]):
+    arr = np.array(latencies) * 1000
+    print(f"[{label}] streams={len(arr)} "
+          f"p50={np.percentile(arr, 50):.1f}ms p95={np.percentile(arr, 95):.1f}ms "
+          f"p99={np.percentile(arr, 99):.1f}ms max={arr.max():.1f}ms")
+
+async def main(streams: int, tokens: int, token_delay: float):
+    sync_client = redis.from_url(settings.REDIS_URL, decode_responses=False)
+    before = await asyncio.gather(*[
+        stream_with_sync_client(sync_client, f"s{i}", tokens, token_delay) for i in range(streams)
+    ])
+    report("before: sync redis", before)
+    sync_client.close()
+
+    pool = aioredis.BlockingConnectionPool.from_url(
+        settings.REDIS_URL,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        timeout=settings.REDIS_POOL_TIMEOUT,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+    )
+    async_client = aioredis.Redis(connection_pool=pool)
+    after = await asyncio.gather(*[
+        stream_with_async_client(async_client, f"s{i}", tokens, token_delay) for i in range(streams)
+    ])
+    report(f"after: redis.asyncio pool(max={settings.REDIS_MAX_CONNECTIONS})", after)
+    await async_client.aclose()
+    await pool.disconnect()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--streams", type=int, default=200)
+    parser.add_argument("--tokens", type=int, default=30)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    args = parser.parse_args()
+    asyncio.run(main(args.streams, args.tokens, args.token_delay))
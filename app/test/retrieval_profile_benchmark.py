@@ -0,0 +1,55 @@
+"""
+검색 프로필(fast / balanced / exhaustive)별 recall@15 및 지연 시간 오프라인 벤치마크.
+
+- 질의 / 정답 : vector_storage_benchmark 와 동일 (무작위 청크 벡터, 순차 스캔 기반 정확한 상위 15개)
+- 각 프로필의 ef_search 로 서비스와 동일한 벡터 leg(_vector_leg, 자동 확장 포함)를 실행
+- 현재 VECTOR_STORAGE_MODE 설정 기준으로 측정
+
+실행 : python app/test/retrieval_profile_benchmark.py --queries 50
+"""
+import sys
+import os
+import time
+import asyncio
+import argparse
+import numpy as np
+from sqlalchemy import text
+
+# 프로젝트 루트 디렉토리를 시스템 경로에 추가
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.services.tools import RETRIEVAL_PROFILES, _vector_leg
+from app.test.vector_storage_benchmark import sample_queries, all_scopes, exact_top_k, TOP_K
+
+async def profile_top_k(profile: str, vector: str, scopes: list[str]) -> tuple[set, float]:
+    async with AsyncSessionLocal() as session:
+        await session.execute(text("SET LOCAL jit = off"))
+        start = time.perf_counter()
+        # _vector_leg 는 list[float] 를 str() 로 바인딩하므로 pgvector 텍스트 표현을 그대로 넘김
+        rows = await _vector_leg(session, vector, scopes, profile)
+        return {row.id for row in rows}, time.perf_counter() - start
+
+async def main(n_queries: int):
+    queries = await sample_queries(n_queries)
+    scopes = await all_scopes()
+    truths = [await exact_top_k(q, scopes) for q in queries]
+
+    print(f"🔍 queries={len(queries)}, storage_mode={settings.VECTOR_STORAGE_MODE}")
+    for profile, config in RETRIEVAL_PROFILES.items():
+        recalls, latencies = [], []
+        for q, truth in zip(queries, truths):
+            found, elapsed = await profile_top_k(profile, q, scopes)
+            recalls.append(len(found & truth) / max(len(truth), 1))
+            latencies.append(elapsed * 1000)
+        print(f"[{profile:>10}] ef_search={config['ef_search']:>4} recall@{TOP_K}={np.mean(recalls):.3f} "
+              f"p50={np.percentile(latencies, 50):.1f}ms p95={np.percentile(latencies, 95):.1f}ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.queries))
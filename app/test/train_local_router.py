@@ -0,0 +1,76 @@
+"""
+로컬 의도 분류기(kNN) 재학습 스크립트.
+
+- 입력 : LLM Router 결정 로그 (settings.ROUTER_LOG_PATH, jsonl)
+- 제외 : 파일 첨부 / 이전 대화 참조 질문 (서비스에서도 로컬 분류기를 거치지 않음)
+- 중복 : 정규화한 질문이 같으면 가장 최근 결정만 사용
+- 출력 : settings.LOCAL_ROUTER_MODEL_PATH (npz). 실행 중인 서버는 파일 mtime 변경을 감지해 다시 적재
+
+실행 : python app/test/train_local_router.py
+"""
+import sys
+import os
+import json
+import argparse
+from collections import Counter
+import numpy as np
+
+# 프로젝트 루트 디렉토리를 시스템 경로에 추가
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from app.core.config import settings
+from app.core.model_registry import model_registry
+
+def load_decisions(log_path: str) -> list[dict]:
+    latest = {}
+    # 회전된 백업(.N ... .1)부터 현재 로그 순으로 읽어 같은 질문은 최신 결정으로 덮어씀
+    paths = [f"{log_path}.{i}" for i in range(settings.ROUTER_LOG_BACKUPS, 0, -1)] + [log_path]
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get("is_file_uploaded") or record.get("references_history"):
+                    continue
+                latest[record["normalized_question"]] = record
+    return list(latest.values())
+
+def build_model(decisions: list[dict], output_path: str):
+    embeddings = model_registry.get_embeddings()
+    vectors = np.array(embeddings.embed_documents([d["question"] for d in decisions]), dtype=np.float32)
+    vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    # 서버가 쓰는 도중의 파일을 읽지 않도록 임시 파일에 저장 후 교체
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(
+            f,
+            vectors=vectors,
+            intents=np.array([d["intent"] for d in decisions], dtype=str),
+            sql_keywords=np.array([json.dumps(d["sql_keywords"], ensure_ascii=False) for d in decisions], dtype=str),
+            vector_queries=np.array([d["vector_query"] for d in decisions], dtype=str),
+            questions=np.array([d["question"] for d in decisions], dtype=str),
+        )
+    os.replace(tmp_path, output_path)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--log", default=settings.ROUTER_LOG_PATH)
+    parser.add_argument("--output", default=settings.LOCAL_ROUTER_MODEL_PATH)
+    args = parser.parse_args()
+
+    decisions = load_decisions(args.log)
+    if not decisions:
+        print(f"⚠️ 학습할 Router 결정 로그가 없습니다: {args.log}")
+        sys.exit(1)
+
+    print(f"🚀 {len(decisions)}개 질문으로 로컬 의도 분류기 학습 ({dict(Counter(d['intent'] for d in decisions))})")
+    build_model(decisions, args.output)
+    print(f"🎉 저장 완료: {args.output}")
@@ -0,0 +1,102 @@
+"""
+문서 벡터 저장 모드(full / halfvec / binary)별 recall@15, 지연 시간, 인덱스 크기 비교 벤치마크.
+
+- 질의 : tbl_deep_nexus_docs 에서 무작위로 뽑은 청크 벡터 (--queries 개)
+- 정답 : 인덱스를 끄고(순차 스캔) 원본 float32 벡터로 계산한 정확한 상위 15개
+- 각 모드는 서비스와 동일한 SQL(build_vector_search_sql)로 실행
+
+사전 준비 : python app/test/create_search_indexes.py (섀도 컬럼 및 인덱스 생성)
+실행 : python app/test/vector_storage_benchmark.py --queries 50
+"""
+import sys
+import os
+import time
+import asyncio
+import argparse
+import numpy as np
+from sqlalchemy import text
+
+# 프로젝트 루트 디렉토리를 시스템 경로에 추가
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.services.tools import build_vector_search_sql
+
+MODES = ["full", "halfvec", "binary"]
+TOP_K = 15
+
+async def sample_queries(n: int) -> list[str]:
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            text("SELECT CAST(content_vector AS text) FROM tbl_deep_nexus_docs ORDER BY random() LIMIT :n"), {"n": n}
+        )
+        return [row[0] for row in result.fetchall()]
+
+async def all_scopes() -> list[str]:
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(text("SELECT DISTINCT unnest(permission_departments) FROM tbl_deep_nexus_docs"))
+        return [row[0] for row in result.fetchall()]
+
+async def exact_top_k(vector: str, scopes: list[str]) -> set:
+    async with AsyncSessionLocal() as session:
+        await session.execute(text("SET LOCAL enable_indexscan = off"))
+        await session.execute(text("SET LOCAL enable_bitmapscan = off"))
+        result = await session.execute(text("""
+            SELECT id FROM tbl_deep_nexus_docs
+            WHERE permission_departments && CAST(:scopes AS text[])
+            ORDER BY content_vector <=> :vector LIMIT :k
+        """), {"vector": vector, "scopes": scopes, "k": TOP_K})
+        return {row.id for row in result.fetchall()}
+
+async def mode_top_k(mode: str, vector: str, scopes: list[str]) -> tuple[set, float]:
+    async with AsyncSessionLocal() as session:
+        if settings.VECTOR_ITERATIVE_SCAN != "off":
+            await session.execute(
+                text("SELECT set_config('hnsw.iterative_scan', :mode, true)"), {"mode": settings.VECTOR_ITERATIVE_SCAN}
+            )
+        start = time.perf_counter()
+        result = await session.execute(build_vector_search_sql(mode), {
+            "vector": vector,
+            "window": settings.RERANK_WINDOW_CHARS,
+            "scopes": scopes,
+            "candidates": settings.VECTOR_RESCORE_CANDIDATES
+        })
+        rows = result.fetchall()
+        return {row.id for row in rows}, time.perf_counter() - start
+
+async def index_sizes():
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(text("""
+            SELECT indexname, pg_size_pretty(pg_relation_size(quote_ident(indexname)::regclass)) AS size, indexdef
+            FROM pg_indexes
+            WHERE tablename = 'tbl_deep_nexus_docs' AND indexdef ILIKE '%USING hnsw%'
+        """))
+        print("\n📦 HNSW 인덱스 크기")
+        for row in result.fetchall():
+            print(f"  - {row.indexname}: {row.size}")
+
+async def main(n_queries: int):
+    queries = await sample_queries(n_queries)
+    scopes = await all_scopes()
+    truths = [await exact_top_k(q, scopes) for q in queries]
+
+    print(f"🔍 queries={len(queries)}, rescore_candidates={settings.VECTOR_RESCORE_CANDIDATES}")
+    for mode in MODES:
+        recalls, latencies = [], []
+        for q, truth in zip(queries, truths):
+            found, elapsed = await mode_top_k(mode, q, scopes)
+            recalls.append(len(found & truth) / max(len(truth), 1))
+            latencies.append(elapsed * 1000)
+        print(f"[{mode:>7}] recall@{TOP_K}={np.mean(recalls):.3f} "
+              f"p50={np.percentile(latencies, 50):.1f}ms p95={np.percentile(latencies, 95):.1f}ms")
+
+    await index_sizes()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.queries))
@@ -0,0 +1,16 @@
+# app/utils/background.py
+import asyncio
+from typing import Awaitable, Set
+
+# 응답 경로를 막지 않는 부가 작업(학습 로그 기록, 캐시 저장 등) 보관소
+# 이벤트 루프는 작업을 약한 참조로만 들고 있으므로, 완료 전에 GC되지 않도록 참조를 유지
+_background_tasks: Set[asyncio.Task] = set()
+
+def run_in_background(coro: Awaitable) -> asyncio.Task:
+    """
+    코루틴을 백그라운드 작업으로 예약 (완료 시 보관소에서 제거, 예외는 작업 내부에서 처리해야 함)
+    """
+    task = asyncio.ensure_future(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
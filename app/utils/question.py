@@ -0,0 +1,50 @@
+# app/utils/question.py
+import re
+import unicodedata
+
+# 이전 대화를 가리키는 표현 ('그', '그것', '이전' 등). 이런 질문은 질문 문장만으로 의도를 판단할 수 없음
+_HISTORY_REFERENCE = re.compile(
+    r"(^|\s)그\s|그것|그거|그걸|그중|그 중|거기|이전|아까|방금|앞서|앞에서|위에서|위의|저번|다시|마저|나머지"
+)
+
+# 키워드 추출 시 떼어내는 조사 (긴 것부터 매칭)
+_PARTICLES = sorted([
+    "에서는", "으로는", "에게서", "이랑", "에서", "에게", "으로", "까지", "부터", "처럼", "하고", "보다",
+    "은", "는", "이", "가", "을", "를", "의", "에", "로", "와", "과", "도", "만", "께",
+], key=len, reverse=True)
+
+# 검색 필터로 의미가 없는 질문 표현
+_KEYWORD_STOPWORDS = {
+    "알려줘", "알려주세요", "알려", "뭐야", "뭐지", "무엇", "무엇인가요", "어떻게", "어떤", "얼마", "얼마나",
+    "있어", "있나요", "있는", "없어", "해줘", "해주세요", "보여줘", "궁금해", "궁금합니다", "대해", "대한", "관련",
+    "내", "나의", "제", "저의", "우리", "좀", "몇", "언제", "어디", "누구", "왜",
+}
+
+def normalize_question(question: str) -> str:
+    """
+    캐시 키 / 학습 데이터 중복 제거용 질문 정규화 (유니코드 NFKC, 소문자, 공백 축약, 끝 문장부호 제거)
+    """
+    normalized = unicodedata.normalize("NFKC", question).lower()
+    normalized = " ".join(normalized.split())
+    return normalized.rstrip(" ?!.~")
+
+def references_history(question: str) -> bool:
+    """
+    질문이 이전 대화 기록을 참조하는지 여부
+    """
+    return bool(_HISTORY_REFERENCE.search(normalize_question(question)))
+
+def extract_keywords(question: str, limit: int = 5) -> list[str]:
+    """
+    질문 문장에서 검색 필터용 키워드 추출 (조사 제거, 의문/요청 표현 제외, 2글자 이상, 등장 순서 유지)
+    """
+    keywords = []
+    for token in re.findall(r"[0-9A-Za-z_가-힣]+", normalize_question(question)):
+        for particle in _PARTICLES:
+            if token.endswith(particle) and len(token) - len(particle) >= 2:
+                token = token[:-len(particle)]
+                break
+        if len(token) < 2 or token in _KEYWORD_STOPWORDS or token in keywords:
+            continue
+        keywords.append(token)
+    return keywords[:limit]